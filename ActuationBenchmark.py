@@ -0,0 +1,134 @@
+import argparse
+import threading
+import time
+import numpy as np
+from VirtualArduino import VirtualArduino
+from MultisensoryDeviceController import MultisensoryDeviceController
+import MarkerProtocol as markers
+
+# Dos estados alternos para que el controlador nunca descarte el comando como redundante
+BENCH_TRIGGERS = ["low_relaxation", "medium_relaxation"]
+
+
+class InstrumentedController(MultisensoryDeviceController):
+    """Controlador real que además registra, por cada marcador procesado, la escritura y el ack.
+
+    La cola de comandos es FIFO y cada marcador LED pasa una vez por process_led_trigger, así que
+    records[i] corresponde al i-ésimo marcador publicado aunque algunos se pierdan o se descarten.
+    """
+
+    def __init__(self, device, *args, **kwargs):
+        self.device = device
+        self.records = []
+        self.current = None
+        super().__init__(*args, **kwargs)
+
+    def process_led_trigger(self, trigger):
+        if trigger in BENCH_TRIGGERS:
+            self.current = {"sent": False, "write": None, "ack": None, "done": False}
+            self.records.append(self.current)
+        record = self.current
+        try:
+            super().process_led_trigger(trigger)
+        finally:
+            # El registro queda completo cuando terminó el intento de envío (con o sin ack)
+            if record is not None:
+                record["done"] = True
+            self.current = None
+
+    def send_to_arduino(self, trigger_value):
+        record = self.current if trigger_value in BENCH_TRIGGERS else None
+        n_before = len(self.device.received)
+        ok = super().send_to_arduino(trigger_value)
+        if record is not None:
+            # Instante en que el Arduino virtual recibió esta línea
+            writes = [t for t, command in self.device.received[n_before:] if command == trigger_value]
+            record["sent"] = True
+            record["write"] = writes[0] if writes else None
+            record["ack"] = time.perf_counter() if ok else None
+        return ok
+
+
+def percentiles(values_ms):
+    if not values_ms:
+        return "sin datos"
+    values = np.asarray(values_ms)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return f"n={len(values)}  p50={p50:.1f} ms  p90={p90:.1f} ms  p99={p99:.1f} ms  max={values.max():.1f} ms"
+
+
+def summarize_drops(records):
+    sent = sum(r["sent"] for r in records)
+    acked = sum(r["ack"] is not None for r in records)
+    return f"{acked} confirmados, {sent - acked} sin ack, {len(records) - sent} omitidos por el controlador"
+
+
+def all_done(records, base, count):
+    """True cuando hay `count` registros desde `base` y ninguno sigue esperando la escritura o el ack."""
+    window = records[base:base + count]
+    return len(window) >= count and all(r["done"] for r in window)
+
+
+def wait_for(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia marcador -> serial -> ack contra un Arduino virtual")
+    parser.add_argument("--samples", type=int, default=30, help="Marcadores para medir la latencia")
+    parser.add_argument("--interval", type=float, default=1.0, help="Segundos entre marcadores en la fase de latencia")
+    parser.add_argument("--burst", type=int, default=100, help="Marcadores enviados de golpe para medir la tasa máxima")
+    parser.add_argument("--delay", type=float, default=0.005, help="Retardo de respuesta del Arduino virtual")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Probabilidad de ack perdido")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tiempo máximo de espera por fase")
+    args = parser.parse_args()
+
+    device = VirtualArduino(response_delay=args.delay, drop_rate=args.drop_rate, seed=0).start()
+    print(f"Arduino virtual en {device.port}")
+
+    # Stream de eventos que el controlador espera encontrar
+    event_outlet = markers.make_event_outlet('bench_events_id')
+    bench_codes = [markers.LED_STATES[trigger] for trigger in BENCH_TRIGGERS]
+
+    controller = InstrumentedController(device, com_port=device.port)
+    threading.Thread(target=controller.run, daemon=True).start()
+    time.sleep(2)  # Dar tiempo a que los inlets se conecten
+
+    # Fase 1: latencia con marcadores espaciados
+    pushed = []
+    base = len(controller.records)
+    for i in range(args.samples):
+        pushed.append(time.perf_counter())
+        event_outlet.push_sample(markers.encode(bench_codes[i % 2]))
+        time.sleep(args.interval)
+    wait_for(lambda: all_done(controller.records, base, args.samples), args.timeout)
+
+    # Cada registro se compara con su propio marcador; los perdidos no desplazan a los siguientes
+    records = controller.records[base:base + args.samples]
+    write_latency = [(r["write"] - p) * 1000 for p, r in zip(pushed, records) if r["write"] is not None]
+    ack_latency = [(r["ack"] - p) * 1000 for p, r in zip(pushed, records) if r["ack"] is not None]
+    print("Marcador -> escritura serial:", percentiles(write_latency))
+    print("Marcador -> ack del Arduino: ", percentiles(ack_latency))
+    print(f"Marcadores: {len(records)}/{args.samples} procesados; {summarize_drops(records)}")
+
+    # Fase 2: tasa sostenida con una ráfaga de marcadores
+    base = len(controller.records)
+    start = time.perf_counter()
+    event_outlet.push_chunk([markers.encode(bench_codes[i % 2]) for i in range(args.burst)])
+    wait_for(lambda: all_done(controller.records, base, args.burst), args.timeout)
+    records = controller.records[base:base + args.burst]
+    acks = [r["ack"] for r in records if r["ack"] is not None]
+    elapsed = (max(acks) if acks else time.perf_counter()) - start
+    print(f"Tasa sostenida: {len(acks)}/{args.burst} comandos confirmados en {elapsed:.2f} s "
+          f"({len(acks) / elapsed if elapsed > 0 else 0:.1f} comandos/s); {summarize_drops(records)}")
+
+    controller.running = False
+    time.sleep(0.5)
+    device.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import defaultdict
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Limita cada tipo de mensaje a `max_count` registros por `interval` segundos.
+
+    El tipo es `extra={'msg_type': ...}` si se indica; si no, el punto del código que
+    hace la llamada. Los mensajes descartados se cuentan y se resumen en el siguiente
+    mensaje del mismo tipo y al cerrar el logging.
+    """
+
+    def __init__(self, max_count=5, interval=1.0):
+        super().__init__()
+        self.max_count = max_count
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.emitted = defaultdict(int)
+        self.suppressed = defaultdict(int)
+        self.pending = defaultdict(int)
+
+    def key(self, record):
+        return getattr(record, 'msg_type', None) or f"{record.module}:{record.lineno}"
+
+    def filter(self, record):
+        # Las advertencias y errores nunca se descartan
+        if record.levelno >= logging.WARNING:
+            return True
+        key = self.key(record)
+        now = time.monotonic()
+        with self.lock:
+            start, count = self.windows.get(key, (now, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            if count >= self.max_count:
+                self.windows[key] = (start, count)
+                self.suppressed[key] += 1
+                self.pending[key] += 1
+                return False
+            self.windows[key] = (start, count + 1)
+            self.emitted[key] += 1
+            skipped = self.pending.pop(key, 0)
+        if skipped:
+            record.msg = f"{record.msg} [+{skipped} similares suprimidos]"
+        return True
+
+    def summary(self):
+        with self.lock:
+            return {key: (self.emitted[key], self.suppressed[key]) for key in self.suppressed}
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que no formatea en el hilo que registra: el formateo se hace en el listener."""
+
+    def prepare(self, record):
+        return record
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """Listener que vacía los handlers con buffer cuando la cola queda ociosa o pasa `flush_interval`."""
+
+    def __init__(self, log_queue, *handlers, flush_interval=0.5):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+        self.last_flush = time.monotonic()
+
+    def dequeue(self, block):
+        while True:
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+
+
+def setup_logging(log_file=None, level=logging.INFO, console=True, max_per_interval=5, interval=1.0,
+                  buffer_size=200, flush_interval=0.5):
+    """Configura el logger raíz para que la E/S (archivo y consola) ocurra en un hilo en segundo plano.
+
+    Devuelve el filtro de límite de frecuencia para consultar sus contadores.
+    """
+    global _listener
+    if _listener is not None:
+        stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_file:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter)
+        # Escritura por lotes: se vacía al llenarse, en cada WARNING o cuando el listener está ocioso
+        handlers.append(logging.handlers.MemoryHandler(buffer_size, flushLevel=logging.WARNING,
+                                                       target=file_handler, flushOnClose=True))
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    rate_filter = RateLimitFilter(max_per_interval, interval)
+    queue_handler.addFilter(rate_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = BatchingQueueListener(log_queue, *handlers, flush_interval=flush_interval)
+    _listener.rate_filter = rate_filter
+    _listener.start()
+    atexit.register(stop_logging)
+    return rate_filter
+
+
+def stop_logging():
+    """Registra el resumen de mensajes suprimidos y vacía la cola antes de salir."""
+    global _listener
+    if _listener is None:
+        return
+    listener = _listener
+    _listener = None
+    for key, (emitted, suppressed) in listener.rate_filter.summary().items():
+        listener.queue.put_nowait(logging.makeLogRecord({
+            'msg': f"Resumen {key}: {emitted} registrados, {suppressed} suprimidos",
+            'levelno': logging.INFO, 'levelname': 'INFO'}))
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,147 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from FilterBank import FilterChain, load_filter_config
+from EEGFeatures import BANDS, band_powers, cognitive_engagement, weighted_channel_mean, filtered_power
+
+# Parámetros iguales a los del guardado en tiempo real
+AVG_ENGAGEMENT_THRESHOLD = 0.5
+N_CHANNELS = 8
+
+
+def find_recordings(root):
+    """Lista los CSV grabados por esperar_stream: participants/<id>/*.csv"""
+    return sorted(glob.glob(os.path.join(root, "*", "*.csv")))
+
+
+def process_recording(csv_path, fs=250, window_seconds=0.4, chunk_size=50000, refilter=False, filter_config=None):
+    """Recalcula engagement, potencias por banda y un indicador theta/alpha de una grabación, leyendo por bloques.
+
+    theta_alpha_proxy no es el puntaje del experimento: ese sale de calculate_interval_based_relaxation
+    sobre las columnas alpha/theta de AURA_Power, que no se graban. Es la fórmula 0.5 * theta + 0.5 * alpha
+    de calculate_relaxation_score aplicada al EEG Kalman grabado, útil solo para comparar sesiones entre sí.
+    """
+    window = int(round(fs * window_seconds))
+    chain = FilterChain(fs, filter_config) if refilter else None
+    if chain is not None and chain.sos is None:
+        chain = None
+    chain_zi = None
+
+    n_samples = 0
+    first_ts = last_ts = None
+    leftover = np.empty((0, N_CHANNELS))
+    band_sum = np.zeros(N_CHANNELS * len(BANDS))
+    n_windows = 0
+    eng_sum = 0.0
+    eng_count = 0
+    relaxed_count = 0
+    theta_sum = alpha_sum = 0.0
+    theta_zi = alpha_zi = None
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        sample_cols = [c for c in chunk.columns if c.startswith("Sample")][:N_CHANNELS]
+        samples = chunk[sample_cols].to_numpy(dtype=float)
+        if not len(samples):
+            continue
+        if chain is not None:
+            # Filtrado causal con el estado arrastrado entre bloques: sin transitorios en los bordes
+            # de cada bloque y válido aunque el último bloque sea muy corto
+            if chain_zi is None:
+                chain_zi = chain.initial_state(samples.shape[1]) * samples[0]
+            samples, chain_zi = chain.sosfilt(samples, chain_zi, axis=0)
+        timestamps = chunk["Timestamp"].to_numpy(dtype=float)
+        first_ts = timestamps[0] if first_ts is None else first_ts
+        last_ts = timestamps[-1]
+        n_samples += len(samples)
+
+        # Engagement acumulado, igual que la media móvil de esperar_stream
+        engagement = cognitive_engagement(samples)
+        valid = np.isfinite(engagement)
+        cumulative = eng_sum + np.cumsum(np.where(valid, engagement, 0.0))
+        counts = eng_count + np.cumsum(valid)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_engagement = cumulative / counts
+        relaxed_count += int(np.sum(avg_engagement[valid] < AVG_ENGAGEMENT_THRESHOLD))
+        eng_sum = cumulative[-1]
+        eng_count = counts[-1]
+
+        # Potencias por banda en ventanas no solapadas (mismo tamaño que el buffer del stage de PSD)
+        data = np.concatenate((leftover, samples))
+        n_full = len(data) // window
+        if n_full:
+            windows = data[:n_full * window].reshape(n_full, window, N_CHANNELS)
+            band_sum += band_powers(windows, fs).sum(axis=0)
+            n_windows += n_full
+        leftover = data[n_full * window:]
+
+        # Indicador theta/alpha offline, con el estado del filtro arrastrado entre bloques
+        weighted = weighted_channel_mean(samples)
+        theta, theta_zi = filtered_power(weighted, 4, 8, fs, zi=theta_zi)
+        alpha, alpha_zi = filtered_power(weighted, 8, 12, fs, zi=alpha_zi)
+        theta_sum += theta
+        alpha_sum += alpha
+
+    participant_id = os.path.basename(os.path.dirname(csv_path))
+    result = {
+        "participant_id": participant_id,
+        "session_file": os.path.basename(csv_path),
+        "n_samples": n_samples,
+        "duration_s": (last_ts - first_ts) if n_samples else 0.0,
+        "mean_engagement": eng_sum / eng_count if eng_count else np.nan,
+        "relaxed_fraction": relaxed_count / eng_count if eng_count else np.nan,
+        "theta_alpha_proxy": 0.5 * theta_sum / n_samples + 0.5 * alpha_sum / n_samples if n_samples else np.nan,
+    }
+    mean_bands = band_sum / n_windows if n_windows else np.full(band_sum.shape, np.nan)
+    for ch in range(N_CHANNELS):
+        for b, band in enumerate(BANDS):
+            result[f"ch{ch + 1}_{band}"] = mean_bands[ch * len(BANDS) + b]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocesamiento offline de todas las sesiones grabadas")
+    parser.add_argument("--root", default="participants", help="Carpeta con participants/<id>/*.csv")
+    parser.add_argument("--output", default="reprocessing_summary.csv", help="Tabla resumen de salida")
+    parser.add_argument("--fs", type=float, default=250, help="Frecuencia de muestreo de las grabaciones")
+    parser.add_argument("--window", type=float, default=0.4, help="Duración de la ventana de PSD en segundos")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Filas leídas por bloque")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto todos los núcleos)")
+    parser.add_argument("--refilter", action="store_true",
+                        help="Volver a aplicar la cadena notch/pasa-banda (causal) antes de calcular las métricas")
+    parser.add_argument("--filter-config", default=None, help="Archivo JSON de la cadena de filtros")
+    args = parser.parse_args()
+
+    files = find_recordings(args.root)
+    if not files:
+        print(f"No se encontraron grabaciones en '{args.root}'.")
+        return
+    filter_config = load_filter_config(args.filter_config) if args.refilter else None
+
+    print(f"Reprocesando {len(files)} grabaciones...")
+    start_time = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(process_recording, path, args.fs, args.window, args.chunk_size,
+                               args.refilter, filter_config): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results.append(future.result())
+                print(f"  OK  {path}")
+            except Exception as e:
+                print(f"  ERROR {path}: {e}")
+
+    if not results:
+        print("No se pudo reprocesar ninguna grabación.")
+        return
+    summary = pd.DataFrame(results).sort_values(["participant_id", "session_file"])
+    summary.to_csv(args.output, index=False)
+    print(f"Resumen guardado en '{args.output}' ({time.time() - start_time:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import socket
+import socketserver
+import threading
+
+# Canal local de comandos hacia el MultisensoryDeviceController (solo loopback)
+COMMAND_HOST = "127.0.0.1"
+COMMAND_PORT = 5757
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw_line in self.rfile:
+            command = raw_line.decode("utf-8").strip()
+            if not command:
+                continue
+            accepted = self.server.on_command(command)
+            reply = f"{'OK' if accepted else 'ERR'} {command}\n"
+            self.wfile.write(reply.encode("utf-8"))
+
+
+class CommandServer(socketserver.ThreadingTCPServer):
+    """Servidor TCP en loopback que recibe un comando por línea y lo entrega a on_command."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, on_command, host=COMMAND_HOST, port=COMMAND_PORT):
+        self.on_command = on_command
+        super().__init__((host, port), _CommandHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class CommandClient:
+    """Cliente del canal de comandos; mantiene la conexión abierta y reconecta si se pierde."""
+
+    def __init__(self, host=COMMAND_HOST, port=COMMAND_PORT, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, command):
+        """Envía un comando y devuelve la respuesta del controlador ('OK <cmd>' o 'ERR <cmd>')."""
+        for attempt in range(2):
+            try:
+                if self.sock is None:
+                    self.connect()
+                self.sock.sendall(f"{command}\n".encode("utf-8"))
+                reply = self.reader.readline().decode("utf-8").strip()
+                if not reply:
+                    raise ConnectionError("Conexión cerrada por el controlador")
+                return reply
+            except OSError:
+                self.close()
+                if attempt == 1:
+                    raise
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.reader.close()
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.reader = None
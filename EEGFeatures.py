@@ -0,0 +1,106 @@
+import numpy as np
+from scipy.signal import welch, sosfilt
+from FilterBank import bandpass_sos, design_sos
+
+# Bandas usadas en el stream AURAPSD (mismo orden por canal)
+BANDS = {
+    "delta": (1, 4),
+    "theta": (4, 8),
+    "alpha": (8, 13),
+    "beta": (13, 30),
+    "gamma": (30, 100),
+}
+
+# Pesos por región para el puntaje de relajación
+FRONTAL_INDICES = [0, 1, 2]
+CENTRAL_INDICES = [3, 4]
+PARIETAL_INDICES = [5, 6, 7]
+REGION_WEIGHTS = np.array([1.0] * len(FRONTAL_INDICES) + [1.2] * len(CENTRAL_INDICES) + [1.5] * len(PARIETAL_INDICES))
+
+
+def band_powers(buffer, fs, nperseg=None):
+    """PSD media por banda para cada canal de un bloque (n, canales) o de varios bloques (ventanas, n, canales).
+
+    Devuelve el mismo orden que publica AURAPSD: [delta, theta, alpha, beta, gamma] de cada canal seguido.
+    """
+    buffer = np.asarray(buffer, dtype=float)
+    axis = buffer.ndim - 2
+    nperseg = min(buffer.shape[axis], nperseg or int(fs))
+    freqs, psd = welch(buffer, fs, nperseg=nperseg, axis=axis)
+    powers = [np.mean(np.compress((freqs >= low) & (freqs <= high), psd, axis=axis), axis=axis)
+              for low, high in BANDS.values()]
+    # (..., canales, bandas) -> intercalado por canal
+    stacked = np.stack(powers, axis=-1)
+    return stacked.reshape(stacked.shape[:-2] + (-1,))
+
+
+def cognitive_engagement(samples):
+    """Compromiso cognitivo theta/alpha muestra a muestra (mismas columnas que calcular_cognitive_engagement)."""
+    samples = np.asarray(samples, dtype=float)
+    alphas = samples[:, 6:8].mean(axis=1)
+    thetas = samples[:, 3:5].mean(axis=1)
+    return thetas / alphas
+
+
+def weighted_channel_mean(eeg_data):
+    """Media por muestra de los canales ponderados por región (frontal, central, parietal)."""
+    eeg_data = np.asarray(eeg_data, dtype=float)
+    return (eeg_data[:, :len(REGION_WEIGHTS)] * REGION_WEIGHTS).mean(axis=1)
+
+
+def filtered_power(data, lowcut, highcut, fs, order=4, zi=None):
+    """Filtra en banda y devuelve (suma de cuadrados, estado final) para poder acumular por bloques."""
+    sos = bandpass_sos(lowcut, highcut, fs, order=order)
+    if zi is None:
+        zi = np.zeros((sos.shape[0], 2))
+    filtered, zf = sosfilt(sos, data, zi=zi)
+    return np.sum(filtered ** 2, axis=0), zf
+
+
+class RecursiveBandPower:
+    """Potencia por banda muestra a muestra: banco de pasa-bandas IIR por banda y canal + envolvente exponencial.
+
+    A diferencia de Welch no necesita llenar una ventana; la latencia es solo el retardo de grupo
+    de los filtros más la constante de tiempo del suavizado. La salida tiene la misma disposición
+    que AURAPSD, pero en unidades de potencia (no densidad espectral).
+    """
+
+    def __init__(self, fs, n_channels=8, order=2, tau=0.25):
+        self.fs = fs
+        self.n_channels = n_channels
+        nyquist = fs / 2
+        sos_bank = []
+        for low, high in BANDS.values():
+            if high >= nyquist:
+                # La banda llega a Nyquist: pasa-altos con el mismo número de secciones
+                sos_bank.append(design_sos("highpass", float(low), 2 * order, float(fs)))
+            else:
+                sos_bank.append(bandpass_sos(low, high, fs, order))
+        sos = np.stack(sos_bank)                      # (bandas, secciones, 6)
+        self.b = sos[:, :, :3, np.newaxis]            # (bandas, secciones, 3, 1)
+        self.a = sos[:, :, 4:, np.newaxis]            # a1, a2
+        n_bands, n_sections = sos.shape[:2]
+        self.z = np.zeros((n_bands, n_sections, 2, n_channels))
+        self.power = np.zeros((n_bands, n_channels))
+        self.alpha = 1.0 - np.exp(-1.0 / (tau * fs))
+
+    def step(self, sample):
+        """Actualiza todas las bandas y canales con una muestra (canales,) y devuelve la potencia (canales * bandas,)."""
+        x = np.broadcast_to(np.asarray(sample, dtype=float), self.power.shape)
+        b, a, z = self.b, self.a, self.z
+        # Forma directa II transpuesta, sección por sección, vectorizada sobre bandas y canales
+        for s in range(z.shape[1]):
+            y = b[:, s, 0] * x + z[:, s, 0]
+            z[:, s, 0] = b[:, s, 1] * x - a[:, s, 0] * y + z[:, s, 1]
+            z[:, s, 1] = b[:, s, 2] * x - a[:, s, 1] * y
+            x = y
+        self.power += self.alpha * (x * x - self.power)
+        return self.power.T.ravel()
+
+    def process(self, block):
+        """Procesa un bloque (n, canales) y devuelve la potencia después de cada muestra (n, canales * bandas)."""
+        block = np.asarray(block, dtype=float).reshape(-1, self.n_channels)
+        out = np.empty((block.shape[0], self.n_channels * len(BANDS)))
+        for i, sample in enumerate(block):
+            out[i] = self.step(sample)
+        return out
@@ -3,6 +3,10 @@ import csv
 import os
 from datetime import datetime
 import pandas as pd
+import argparse
+from StageProfiler import StageProfiler, add_profiling_arguments
+from EEGFeatures import cognitive_engagement
+import MarkerProtocol as markers
 
 # Parámetros para los cálculos de engagement
 CURRENT_ENGAGEMENT_THRESHOLD = 0.5
@@ -32,26 +36,24 @@ def initialize_keyboard_stream():
 
 def calcular_cognitive_engagement(df_real_time):
     """Calcula el compromiso cognitivo usando las bandas de Alpha y Theta."""
-    alphas = df_real_time.iloc[:, 6:8].mean(axis=1)
-    thetas = df_real_time.iloc[:, 3:5].mean(axis=1)
-    df_real_time['CEng'] = thetas / alphas
+    df_real_time['CEng'] = cognitive_engagement(df_real_time.iloc[:, :8].values)
     return df_real_time
 
-def esperar_stream():
+def esperar_stream(profiler=None):
     """Monitorea los streams y guarda los datos junto con triggers y engagement en sesiones activas."""
     canales = pylsl.resolve_stream('name', 'AURAKalmanFilteredEEG')
     canales_EEG = pylsl.resolve_stream('name', 'AURAPSD')
     canales_triggers = pylsl.resolve_stream('name', 'relaxation_stream')
-    canales_eeg_stream = pylsl.resolve_stream('name', 'eeg_stream')
+    canales_eventos = pylsl.resolve_stream('name', markers.EVENT_STREAM_NAME)
 
-    if not (canales and canales_EEG and canales_triggers and canales_eeg_stream):
+    if not (canales and canales_EEG and canales_triggers and canales_eventos):
         print("Error: Asegúrate de que todos los streams necesarios estén activos.")
         return
 
     entrada = pylsl.StreamInlet(canales[0])
     entrada_EEG = pylsl.StreamInlet(canales_EEG[0])
     entrada_triggers = pylsl.StreamInlet(canales_triggers[0])
-    entrada_eeg_stream = pylsl.StreamInlet(canales_eeg_stream[0])
+    entrada_eventos = pylsl.StreamInlet(canales_eventos[0])
 
     inlet_markers, unity_inlet = initialize_keyboard_stream()
     print("Esperando datos desde los streams.")
@@ -67,16 +69,27 @@ def esperar_stream():
     writer_eeg = None
     df_real_time = pd.DataFrame()
     engagement_values = []
+    profiler = profiler or StageProfiler("trigger_saver")
 
     while True:
+        profiler.tick()
         sample, timestamp = entrada.pull_sample()
         sample_EEG, timestamp_EEG = entrada_EEG.pull_sample()        
         triggers, _ = entrada_triggers.pull_sample(0)
-        eeg_triggers, _ = entrada_eeg_stream.pull_sample(0)
+        # Estados de LED (misma columna EEG_Trigger que antes) y aromas desde el stream de eventos
+        eeg_triggers = None
+        scent = None
+        evento, _ = entrada_eventos.pull_sample(0)
+        if evento:
+            code, _, _ = markers.decode(evento)
+            if code in markers.LED_CODES:
+                eeg_triggers = [markers.EVENT_NAMES[code]]
+            elif code in markers.SCENT_CODES:
+                scent = [markers.EVENT_NAMES[code]]
 
         if unity_inlet:
-            markers, _ = unity_inlet.pull_sample(0)
-            marker_label = markers[0] if markers else "0"
+            unity_markers, _ = unity_inlet.pull_sample(0)
+            marker_label = unity_markers[0] if unity_markers else "0"
         else:
             marker_label = "0"
 
@@ -101,7 +114,7 @@ def esperar_stream():
                     archivo_csv = open(csv_path, "w", newline="")
                     writer = csv.writer(archivo_csv)
                     writer.writerow(['Timestamp'] + [f"Sample{i}" for i in range(len(sample))] + 
-                                    ['Trigger', 'Marker', 'EEG_Trigger', 'Current Engagement', 'Avg Engagement', 'Relaxed'])
+                                    ['Trigger', 'Marker', 'EEG_Trigger', 'Scent', 'Current Engagement', 'Avg Engagement', 'Relaxed'])
                     print(f"Grabación iniciada: {session_name}")
 
                 elif command == "end_session" and grabando:
@@ -117,7 +130,9 @@ def esperar_stream():
                 engagement_values.append(current_engagement)
                 avg_engagement = sum(engagement_values) / len(engagement_values)
                 relaxed = avg_engagement < AVG_ENGAGEMENT_THRESHOLD
-                writer.writerow([timestamp] + sample + [str(triggers), marker_label, str(eeg_triggers), 
+                writer.writerow([timestamp] + sample + [str(triggers), marker_label, str(eeg_triggers), str(scent),
                               current_engagement, avg_engagement, relaxed])
 
-esperar_stream()
+parser = add_profiling_arguments(argparse.ArgumentParser(description="Guardado de EEG, triggers y engagement por sesión"))
+args = parser.parse_args()
+esperar_stream(StageProfiler.from_args("trigger_saver", args))
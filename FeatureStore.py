@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from EEGFeatures import BANDS, band_powers
+
+N_CHANNELS = 8
+# Incrementar al cambiar el cálculo de band_powers para invalidar la caché existente
+FEATURE_VERSION = 1
+
+DEFAULT_FEATURE_CONFIG = {
+    "fs": 250,
+    "epoch_seconds": 2.0,
+    "label_column": "Relaxed",
+}
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 del contenido de una grabación."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_hash(config):
+    text = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def extract_epoch_features(csv_path, config, chunk_size=50000):
+    """Potencias por banda de cada época (épocas, canales * bandas) y etiqueta mayoritaria de la época."""
+    fs = config["fs"]
+    epoch = int(round(fs * config["epoch_seconds"]))
+    label_column = config["label_column"]
+    leftover = np.empty((0, N_CHANNELS))
+    leftover_labels = np.empty(0)
+    features = []
+    labels = []
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        sample_cols = [c for c in chunk.columns if c.startswith("Sample")][:N_CHANNELS]
+        data = np.concatenate((leftover, chunk[sample_cols].to_numpy(dtype=float)))
+        if label_column in chunk.columns:
+            chunk_labels = chunk[label_column].astype(str).str.lower().eq("true").to_numpy(dtype=float)
+        else:
+            chunk_labels = np.full(len(chunk), np.nan)
+        all_labels = np.concatenate((leftover_labels, chunk_labels))
+
+        n_full = len(data) // epoch
+        if n_full:
+            epochs = data[:n_full * epoch].reshape(n_full, epoch, N_CHANNELS)
+            features.append(band_powers(epochs, fs))
+            labels.append(np.nanmean(all_labels[:n_full * epoch].reshape(n_full, epoch), axis=1) >= 0.5)
+        leftover = data[n_full * epoch:]
+        leftover_labels = all_labels[n_full * epoch:]
+
+    if not features:
+        return np.empty((0, N_CHANNELS * len(BANDS))), np.empty(0, dtype=bool)
+    return np.concatenate(features), np.concatenate(labels)
+
+
+def _compute_entry(args):
+    csv_path, config, entry_path = args
+    features, labels = extract_epoch_features(csv_path, config)
+    tmp_path = entry_path + ".tmp.npz"
+    np.savez(tmp_path, features=features, labels=labels)
+    os.replace(tmp_path, entry_path)
+    return csv_path
+
+
+class FeatureStore:
+    """Caché incremental de features por época, indexada por hash de la grabación y de la configuración."""
+
+    def __init__(self, cache_dir="feature_cache", config=None):
+        self.cache_dir = cache_dir
+        self.config = dict(DEFAULT_FEATURE_CONFIG, **(config or {}))
+        # La clave incluye las bandas y la versión del cálculo: si cambian, no se reutilizan entradas viejas
+        self.config_key = config_hash(dict(self.config, bands=BANDS, feature_version=FEATURE_VERSION))
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = self.load_index()
+
+    def load_index(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def session_hash(self, csv_path):
+        """Reutiliza el hash si el archivo no cambió de tamaño ni de fecha; si no, lo recalcula."""
+        stat = os.stat(csv_path)
+        key = os.path.abspath(csv_path)
+        entry = self.index.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        digest = file_hash(csv_path)
+        self.index[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest}
+        return digest
+
+    def entry_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}_{self.config_key}.npz")
+
+    def update(self, csv_paths, workers=None):
+        """Calcula en paralelo solo las sesiones nuevas o modificadas. Devuelve cuántas se recalcularon."""
+        pending = []
+        for path in csv_paths:
+            entry_path = self.entry_path(self.session_hash(path))
+            if not os.path.exists(entry_path):
+                pending.append((path, self.config, entry_path))
+        self.save_index()
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for path in pool.map(_compute_entry, pending):
+                    print(f"  Features calculadas: {path}")
+        return len(pending)
+
+    def load(self, csv_paths):
+        """Concatena las features y etiquetas cacheadas de las sesiones indicadas."""
+        features = []
+        labels = []
+        groups = []
+        for path in csv_paths:
+            with np.load(self.entry_path(self.session_hash(path))) as entry:
+                features.append(entry["features"])
+                labels.append(entry["labels"])
+                groups.extend([os.path.basename(os.path.dirname(path))] * len(entry["labels"]))
+        if not features:
+            return np.empty((0, N_CHANNELS * len(BANDS))), np.empty(0, dtype=bool), []
+        return np.concatenate(features), np.concatenate(labels), groups
+
+    def prune(self, csv_paths):
+        """Elimina entradas de caché que ya no corresponden a ninguna sesión con la configuración actual."""
+        keep = {os.path.basename(self.entry_path(self.session_hash(path))) for path in csv_paths}
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz") and name not in keep:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        known = {os.path.abspath(path) for path in csv_paths}
+        self.index = {key: value for key, value in self.index.items() if key in known}
+        self.save_index()
+        return removed
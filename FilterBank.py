@@ -0,0 +1,101 @@
+import json
+import os
+from functools import lru_cache
+import numpy as np
+from scipy import signal
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "filter_config.json")
+
+DEFAULT_CONFIG = {
+    "notch": {"cutoff": 50, "Q": 30},
+    "bandpass": {"lowcut": 1.0, "highcut": 50.0, "order": 5},
+}
+
+
+@lru_cache(maxsize=None)
+def _cached_sos(ftype, cutoffs, order, fs, Q=None):
+    if ftype == "notch":
+        b, a = signal.iirnotch(cutoffs, Q, fs=fs)
+        sos = signal.tf2sos(b, a)
+    elif ftype == "bandpass":
+        sos = signal.butter(order, list(cutoffs), btype='band', fs=fs, output='sos')
+    elif ftype in ("lowpass", "highpass"):
+        sos = signal.butter(order, cutoffs, btype=ftype, fs=fs, output='sos')
+    else:
+        raise ValueError(f"Tipo de filtro no soportado: {ftype}")
+    # La copia en caché se comparte entre llamadas: se protege contra escritura
+    sos.setflags(write=False)
+    return sos
+
+
+def design_sos(ftype, cutoffs, order, fs, Q=None):
+    """Diseña (una sola vez por combinación de parámetros) un filtro en formato SOS.
+
+    :param ftype: 'notch', 'bandpass', 'lowpass' o 'highpass'
+    :param cutoffs: frecuencia de corte o tupla (baja, alta) en Hz
+    :param order: orden del Butterworth (ignorado en el notch)
+    :param fs: frecuencia de muestreo de la señal
+    :param Q: factor de calidad del notch
+
+    Devuelve una copia escribible: sosfilt/sosfiltfilt de scipy rechazan arreglos de solo lectura.
+    """
+    return _cached_sos(ftype, cutoffs, order, fs, Q).copy()
+
+
+def notch_sos(cutoff, fs, Q=30):
+    return design_sos("notch", float(cutoff), 0, float(fs), float(Q))
+
+
+def bandpass_sos(lowcut, highcut, fs, order=5):
+    return design_sos("bandpass", (float(lowcut), float(highcut)), int(order), float(fs))
+
+
+def load_filter_config(path=None):
+    """Carga la configuración de la cadena de filtros; si no existe el archivo se usan los valores por defecto."""
+    path = path or DEFAULT_CONFIG_PATH
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            user_config = json.load(f)
+        for section, values in user_config.items():
+            if values is None:
+                config[section] = None
+            else:
+                config.setdefault(section, {}).update(values)
+    return config
+
+
+class FilterChain:
+    """Cadena notch + pasa-banda con coeficientes SOS diseñados una sola vez."""
+
+    def __init__(self, fs, config=None):
+        config = config if config is not None else load_filter_config()
+        self.fs = fs
+        self.stages = []
+        if config.get("notch"):
+            notch = config["notch"]
+            self.stages.append(notch_sos(notch["cutoff"], fs, notch.get("Q", 30)))
+        if config.get("bandpass"):
+            bp = config["bandpass"]
+            self.stages.append(bandpass_sos(bp["lowcut"], bp["highcut"], fs, bp.get("order", 5)))
+        # Secciones concatenadas para el filtrado causal (en cascada equivale a aplicar cada etapa)
+        self.sos = np.vstack(self.stages) if self.stages else None
+
+    def filtfilt(self, data, axis=0):
+        """Filtrado de fase cero sobre una ventana (todas las columnas a la vez), etapa por etapa.
+
+        Cada etapa usa el mismo padlen que filtfilt(b, a) (3 * número de coeficientes), así la
+        última muestra de una ventana corta coincide con la de los filtros notch y pasa-banda originales.
+        """
+        data = np.asarray(data)
+        for sos in self.stages:
+            data = signal.sosfiltfilt(sos, data, axis=axis, padlen=3 * (2 * len(sos) + 1))
+        return data
+
+    def initial_state(self, n_channels):
+        """Estado inicial para filtrado causal muestra a muestra con sosfilt."""
+        zi = signal.sosfilt_zi(self.sos)
+        return np.repeat(zi[:, :, np.newaxis], n_channels, axis=2)
+
+    def sosfilt(self, data, zi, axis=0):
+        return signal.sosfilt(self.sos, data, axis=axis, zi=zi)
@@ -2,47 +2,84 @@ from pylsl import StreamInlet, resolve_stream, StreamInfo, StreamOutlet
 import time
 import os
 import numpy as np
-from scipy.signal import welch
+from EEGFeatures import band_powers, RecursiveBandPower
 import matplotlib.pyplot as plt
+import argparse
+import logging
+from AsyncLogging import setup_logging
+from SharedMemoryTransport import SharedMemoryRing
+from StageProfiler import StageProfiler, add_profiling_arguments
+
+parser = argparse.ArgumentParser(description="Calculo de PSD por bandas sobre el EEG filtrado")
+parser.add_argument("--shm", action="store_true",
+                    help="Leer el EEG filtrado desde memoria compartida en lugar de LSL")
+parser.add_argument("--shm-name", default="AURAKalmanFilteredEEG_shm", help="Nombre del segmento de memoria compartida")
+parser.add_argument("--mode", choices=["welch", "recursive"], default="welch",
+                    help="welch: PSD por ventanas de 0.4 s; recursive: potencia por banda en cada muestra")
+parser.add_argument("--tau", type=float, default=0.25,
+                    help="Constante de tiempo (s) de la envolvente en modo recursive")
+add_profiling_arguments(parser)
+args = parser.parse_args()
+profiler = StageProfiler.from_args("bandpower", args)
+setup_logging()
 
 # Configura matplotlib para el modo interactivo
 plt.ion()
 ruta_codigo1 = "LSL_filter_raw_data.py"
-fs = 100  # Frecuencia de muestreo en Hz
-nperseg = 100  # Número de puntos por segmento para Welch's method
-buffer_size = fs * 0.4  # Tamaño del buffer (0.4 segundos de datos)
 buffer = np.empty((0, 8))  # Asumiendo 8 electrodos
 
 # Resolver el stream de EEG
-os.system(f"start cmd /c python {ruta_codigo1}")
+shm_flags = f" --shm --shm-name {args.shm_name}" if args.shm else ""
+os.system(f"start cmd /c python {ruta_codigo1}{shm_flags}")
 time.sleep(5)
 print("AURAFilteredEEG")
-print("looking for an EEG stream...")
-streams = resolve_stream('name', 'AURAKalmanFilteredEEG')
-inlet = StreamInlet(streams[0])
+if args.shm:
+    print("attaching to shared memory ring...")
+    ring = SharedMemoryRing.attach(args.shm_name)
+    inlet = None
+    fs = ring.fs
+else:
+    print("looking for an EEG stream...")
+    streams = resolve_stream('name', 'AURADecimatedEEG')
+    inlet = StreamInlet(streams[0])
+    fs = inlet.info().nominal_srate()
+
+# La frecuencia de muestreo real viene del stream decimado, no de una constante
+nperseg = int(fs)  # Número de puntos por segmento para Welch's method (1 segundo)
+window_seconds = 0.4
+buffer_size = fs * window_seconds  # Tamaño del buffer (0.4 segundos de datos)
+print(f"Frecuencia de muestreo de entrada: {fs} Hz")
 
-# Crear un nuevo stream para enviar los valores de PSD
-info_psd = StreamInfo('AURAPSD', 'PSD', 5 * buffer.shape[1], fs, 'float32', 'myuid34234')
+# Crear un nuevo stream para enviar los valores de PSD, con la tasa real de salida:
+# una muestra por ventana en welch, una por muestra de entrada en recursive
+psd_fs = fs if args.mode == "recursive" else 1.0 / window_seconds
+info_psd = StreamInfo('AURAPSD', 'PSD', 5 * buffer.shape[1], psd_fs, 'float32', 'myuid34234')
+info_psd.desc().append_child_value("estimator", args.mode)
 outlet_psd = StreamOutlet(info_psd)
+estimator = RecursiveBandPower(fs, buffer.shape[1], tau=args.tau) if args.mode == "recursive" else None
 
 # Captura de datos
 print("Iniciando captura...")
 while True:
-    sample, timestamp = inlet.pull_sample()
+    profiler.tick()
+    if inlet is not None:
+        sample, timestamp = inlet.pull_sample()
+    else:
+        # Bloque completo de muestras nuevas desde el ring local
+        sample, timestamp = ring.wait()
+
+    if estimator is not None:
+        # Modo recursivo: una salida por muestra, sin esperar a llenar una ventana
+        powers = estimator.process(sample)
+        outlet_psd.push_chunk(powers.tolist())
+        logging.info("PSD values sent: %s", powers[-1].tolist())
+        continue
+
     buffer = np.vstack([buffer, sample])
 
     if len(buffer) >= buffer_size:
-        psd_values = []
-
-        # Calcular PSD para cada electrodo
-        for i in range(buffer.shape[1]):
-            nperseg_adjusted = min(len(buffer[:, i]), nperseg)  # Adjust nperseg to be the minimum of input length or specified nperseg
-            freqs, psd = welch(buffer[:, i], fs, nperseg=nperseg_adjusted)
-            psd_values.append(np.mean(psd[(freqs >= 1) & (freqs <= 4)]))  # Delta
-            psd_values.append(np.mean(psd[(freqs >= 4) & (freqs <= 8)]))  # Theta
-            psd_values.append(np.mean(psd[(freqs >= 8) & (freqs <= 13)]))  # Alpha
-            psd_values.append(np.mean(psd[(freqs >= 13) & (freqs <= 30)]))  # Beta
-            psd_values.append(np.mean(psd[(freqs >= 30) & (freqs <= 100)]))  # Gamma
+        # Calcular PSD de todos los electrodos a la vez: Delta, Theta, Alpha, Beta, Gamma por canal
+        psd_values = band_powers(buffer, fs, nperseg=nperseg).tolist()
 
         # Envía los valores de PSD a través del outlet LSL
         outlet_psd.push_sample(psd_values)
@@ -52,4 +89,4 @@ while True:
         buffer = np.empty((0, 8))
 
         # Imprimir los valores de PSD (opcional)
-        print("PSD values sent:", psd_values)
+        logging.info("PSD values sent: %s", psd_values)
@@ -2,11 +2,37 @@
 from pylsl import StreamInlet, resolve_stream
 import numpy as np
 from pylsl import StreamInfo, StreamOutlet
-from scipy import signal
 from filterpy.kalman import KalmanFilter
+import argparse
+import time
+from SharedMemoryTransport import SharedMemoryRing
+from PolyphaseResampler import StreamingPolyphaseResampler
+from FilterBank import FilterChain, load_filter_config
+from StageCheckpoint import config_signature, save_checkpoint, load_checkpoint
+from StageProfiler import StageProfiler, add_profiling_arguments
 ################################ Librerias #############################################################################
 
 
+######################## Argumentos ####################################################################################
+parser = argparse.ArgumentParser(description="Filtrado notch/pasa-banda/Kalman del EEG crudo")
+parser.add_argument("--shm", action="store_true",
+                    help="Publicar tambien la senal Kalman en memoria compartida para etapas locales")
+parser.add_argument("--shm-name", default="AURAKalmanFilteredEEG_shm", help="Nombre del segmento de memoria compartida")
+parser.add_argument("--out-fs", type=float, default=100,
+                    help="Frecuencia de muestreo del stream decimado para las etapas de PSD y puntaje")
+parser.add_argument("--filter-config", default=None,
+                    help="Archivo JSON con la cadena de filtros (notch, pasa-banda, orden)")
+parser.add_argument("--checkpoint", default="filter_stage_checkpoint.npz",
+                    help="Archivo con el estado del Kalman para reanudar en caliente ('' para desactivar)")
+parser.add_argument("--checkpoint-interval", type=float, default=1.0, help="Segundos entre checkpoints")
+parser.add_argument("--checkpoint-max-age", type=float, default=300.0,
+                    help="Edad máxima (s) de un checkpoint para reutilizar el estado del Kalman al iniciar")
+add_profiling_arguments(parser)
+args = parser.parse_args()
+profiler = StageProfiler.from_args("filter", args)
+######################## Argumentos ####################################################################################
+
+
 ######################## LSL INPUT EEG #################################################################################
 print("looking for an EEG stream...")
 streams = resolve_stream('name', 'AURA_Filtered')
@@ -14,44 +40,11 @@ inlet = StreamInlet(streams[0])
 ######################## LSL INPUT EEG #################################################################################
 
 
-###################### Funciones #######################################################################################
-class Notch:
-    def __init__(self, cutoff=50, Q=30, fs=250):
-        '''
-        Funcion para aplicar filtro pasa alto en una señal de un canal
-        :param cutoff: Corte de frecuencia, banda que se eliminara
-        :param Q: 
-        :param fs: Frecuencia de muestreo de la senal
-        '''
-        self.cutoff = cutoff
-        self.Q = Q
-        nyq = 0.5 * fs
-        w0 = cutoff / nyq
-        self.b, self.a = signal.iirnotch(w0, Q)
-
-    def process(self, data, axis=0):
-        return signal.filtfilt(self.b, self.a, data, axis)
-
-def butter_bandpass(lowcut, highcut, fs, order=5):
-    nyq = 0.5 * fs
-    low = lowcut / nyq
-    high = highcut / nyq
-    [b, a] = signal.butter(order, [low, high], btype='band')
-    return b, a
-
-def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_bandpass(lowcut, highcut, fs, order=order)
-    y = signal.filtfilt(b, a, data, axis=0)
-    return y
-###################### Funciones #######################################################################################
-
-
 ########################### Variables ##################################################################################
 SCALE_FACTOR_EEG = (4500000)/24/(2**23-1) #uV/count
 fs = 250
-cutNotch = 50
-cutBP = (1.0, 50.0)
-orden = 5
+filter_config = load_filter_config(args.filter_config)
+filter_chain = FilterChain(fs, filter_config)
 nCanales = 8
 raweeg = np.zeros((1, nCanales))
 oldSample = None
@@ -84,9 +77,38 @@ outlet = StreamOutlet(info)
 # Crear un segundo StreamOutlet para la señal filtrada por Kalman
 info_kalman = StreamInfo('AURAKalmanFilteredEEG', 'EEG', nCanales, fs, 'float32', 'pythonKlmFlt')
 outlet_kalman = StreamOutlet(info_kalman)
+
+# Stream Kalman decimado (anti-aliasing polifasico) para las etapas de PSD y puntaje
+resampler = StreamingPolyphaseResampler(fs, args.out_fs, nCanales)
+fs_out = resampler.fs_out
+info_decimated = StreamInfo('AURADecimatedEEG', 'EEG', nCanales, fs_out, 'float32', 'pythonKlmDec')
+info_decimated.desc().append_child_value("sampling_frequency", str(fs_out))
+info_decimated.desc().append_child_value("source_sampling_frequency", str(fs))
+outlet_decimated = StreamOutlet(info_decimated)
+
+# Transporte local opcional: las etapas en la misma maquina leen del ring sin pasar por la red
+ring_kalman = SharedMemoryRing.create(args.shm_name, nCanales, capacity=int(fs_out * 10), fs=fs_out) if args.shm else None
 ###################### LSL OUTPUT EEG ##################################################################################
 
 
+###################### Checkpoint ######################################################################################
+# Solo el estado del Kalman (x, P) se reanuda si la fuente y la configuración son las mismas.
+# La ventana de filtrado de fase cero no se guarda: tras un reinicio siempre hay un hueco de datos
+# de varios segundos y pegar muestras nuevas a la ventana vieja produciría un escalón en filtfilt,
+# así que la ventana se recalibra (0.5 s) como en un arranque normal.
+source_info = inlet.info()
+checkpoint_signature = config_signature(source_name=source_info.name(), source_id=source_info.source_id(),
+                                        fs=fs, nCanales=nCanales, scale=SCALE_FACTOR_EEG,
+                                        filter_config=filter_config, out_fs=args.out_fs)
+last_checkpoint = time.monotonic()
+state = load_checkpoint(args.checkpoint, checkpoint_signature, args.checkpoint_max_age) if args.checkpoint else None
+if state is not None and state["kf_x"].shape == (nCanales,):
+    kf.x = state["kf_x"]
+    kf.P = state["kf_P"]
+    print("Estado del Kalman restaurado desde checkpoint.")
+###################### Checkpoint ######################################################################################
+
+
 ###################### Ejecucion #######################################################################################
 print("Iniciando captura...")
 while True:
@@ -109,12 +131,8 @@ while True:
     else:
         raweeg = np.concatenate((raweeg, rawdata))
         raweeg = raweeg[1:np.shape(raweeg)[0]]
-        filterEEG = raweeg.copy()
-        filterEEG = raweeg.copy().transpose()
-        for i in range(len(filterEEG)):
-            fltNotch = Notch(cutNotch, fs=fs)
-            filterEEG[i] = fltNotch.process(filterEEG[i])
-            filterEEG[i] = butter_bandpass_filter(filterEEG[i], lowcut=cutBP[0], highcut=cutBP[1], fs=fs, order=orden)
+        # Notch y pasa-banda de fase cero sobre todos los canales, con coeficientes precalculados
+        filterEEG = filter_chain.filtfilt(raweeg, axis=0).transpose()
         # Enviar la señal después de los filtros notch y pasa-banda
         outlet.push_sample(filterEEG[:, -1])
         # Aplicar el Filtro de Kalman
@@ -128,5 +146,25 @@ while True:
         # Enviar la señal después del filtro de Kalman
         outlet_kalman.push_sample(kalman_filtered_sample)
 
+        # Decimar y publicar solo cuando el resampler produce una muestra nueva, con timestamps
+        # corregidos por el retardo del FIR para seguir alineados con los streams de 250 Hz y los marcadores
+        decimated = resampler.process(kalman_filtered_sample)
+        if len(decimated):
+            decimated_stamps = resampler.output_timestamps(len(decimated), timestamp)
+            outlet_decimated.push_chunk(decimated.tolist(), decimated_stamps.tolist())
+            if ring_kalman is not None:
+                ring_kalman.write(decimated, decimated_stamps)
+
+        # Checkpoint periódico del estado de la etapa
+        if args.checkpoint and time.monotonic() - last_checkpoint >= args.checkpoint_interval:
+            try:
+                save_checkpoint(args.checkpoint, checkpoint_signature, kf_x=kf.x, kf_P=kf.P)
+            except OSError as e:
+                # En Windows el reemplazo puede fallar si otro proceso tiene el archivo abierto;
+                # se reintenta en el siguiente intervalo sin detener el filtrado
+                print(f"No se pudo guardar el checkpoint: {e}")
+            last_checkpoint = time.monotonic()
+
     oldSample = sample
+    profiler.tick()
 ###################################################### Ejecucion #######################################################
@@ -0,0 +1,220 @@
+import threading
+import time
+import numpy as np
+from pylsl import StreamInlet, resolve_byprop
+import matplotlib
+matplotlib.use("TkAgg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from EEGFeatures import BANDS
+import MarkerProtocol as markers
+
+N_CHANNELS = 8
+
+
+def minmax_decimate(data, n_bins):
+    """Reduce (n, canales) a 2 * n_bins puntos conservando los picos (mínimo y máximo de cada bin)."""
+    n = data.shape[0]
+    if n <= 2 * n_bins:
+        return np.arange(n), data
+    bin_size = n // n_bins
+    usable = bin_size * n_bins
+    # Los bins se alinean al final del buffer para que la muestra más reciente siempre se vea
+    binned = data[n - usable:].reshape(n_bins, bin_size, -1)
+    mins = binned.min(axis=1)
+    maxs = binned.max(axis=1)
+    decimated = np.empty((2 * n_bins, data.shape[1]))
+    decimated[0::2] = mins
+    decimated[1::2] = maxs
+    x = n - usable + np.repeat(np.arange(n_bins) * bin_size, 2) + np.tile([0, bin_size - 1], n_bins)
+    return x, decimated
+
+
+class LSLLiveReader:
+    """Hilo que lee EEG, PSD y puntaje de relajación por bloques y guarda lo último en buffers circulares."""
+
+    def __init__(self, eeg_stream='AURAKalmanFilteredEEG', psd_stream='AURAPSD', score_stream=markers.EVENT_STREAM_NAME,
+                 seconds=5, fs=250):
+        self.stream_names = {"eeg": eeg_stream, "psd": psd_stream, "score": score_stream}
+        self.fs = fs
+        self.seconds = seconds
+        self.eeg = np.zeros((int(seconds * fs), N_CHANNELS))
+        self.eeg_pos = 0
+        self.band_powers = np.zeros(len(BANDS))
+        self.score = None
+        self.lock = threading.Lock()
+        self.running = False
+        self.inlets = {}
+
+    def start(self):
+        self.running = True
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+    def connect(self):
+        """Intenta resolver los streams que falten sin bloquear más de un instante."""
+        for key, name in self.stream_names.items():
+            if key in self.inlets:
+                continue
+            streams = resolve_byprop('name', name, timeout=0.2)
+            if streams:
+                inlet = StreamInlet(streams[0], max_buflen=max(1, self.seconds))
+                self.inlets[key] = inlet
+                if key == "eeg" and inlet.info().nominal_srate() > 0:
+                    self.resize_eeg(int(inlet.info().nominal_srate()))
+
+    def resize_eeg(self, fs):
+        with self.lock:
+            if fs != self.fs:
+                self.fs = fs
+                self.eeg = np.zeros((int(self.seconds * fs), N_CHANNELS))
+                self.eeg_pos = 0
+
+    def run(self):
+        last_connect = 0
+        while self.running:
+            if len(self.inlets) < len(self.stream_names) and time.time() - last_connect > 2:
+                self.connect()
+                last_connect = time.time()
+            if not self.inlets:
+                time.sleep(0.2)
+                continue
+
+            if "eeg" in self.inlets:
+                chunk, _ = self.inlets["eeg"].pull_chunk(timeout=0.05)
+                if chunk:
+                    self.push_eeg(np.asarray(chunk)[:, :N_CHANNELS])
+            if "psd" in self.inlets:
+                chunk, _ = self.inlets["psd"].pull_chunk(timeout=0.0)
+                if chunk:
+                    # Potencia relativa por banda, promediada entre canales
+                    latest = np.asarray(chunk[-1]).reshape(-1, len(BANDS)).mean(axis=0)
+                    total = latest.sum()
+                    with self.lock:
+                        self.band_powers = latest / total if total > 0 else latest
+            if "score" in self.inlets:
+                chunk, _ = self.inlets["score"].pull_chunk(timeout=0.0)
+                for event in chunk:
+                    code, value, _ = markers.decode(event)
+                    if code == markers.RELAXATION_SCORE:
+                        with self.lock:
+                            self.score = value
+            if "eeg" not in self.inlets:
+                time.sleep(0.05)
+
+    def push_eeg(self, block):
+        with self.lock:
+            n = len(self.eeg)
+            block = block[-n:]
+            end = self.eeg_pos + len(block)
+            if end <= n:
+                self.eeg[self.eeg_pos:end] = block
+            else:
+                first = n - self.eeg_pos
+                self.eeg[self.eeg_pos:] = block[:first]
+                self.eeg[:end - n] = block[first:]
+            self.eeg_pos = end % n
+
+    def snapshot(self):
+        """Copia ordenada (más antigua a más reciente) del EEG y los últimos valores de PSD y puntaje."""
+        with self.lock:
+            eeg = np.concatenate((self.eeg[self.eeg_pos:], self.eeg[:self.eeg_pos]))
+            return eeg, self.band_powers.copy(), self.score
+
+
+class LiveSignalPanel:
+    """Panel de matplotlib para Tk con EEG desplazable, potencias por banda y puntaje, redibujado con blitting."""
+
+    def __init__(self, parent, reader, max_fps=15, channel_span=100.0, bg="black", fg="white"):
+        self.parent = parent
+        self.reader = reader
+        self.interval_ms = int(1000 / max_fps)
+        self.channel_span = channel_span  # µV reservados para cada canal
+
+        self.figure = Figure(figsize=(6, 5), dpi=100, facecolor=bg)
+        grid = self.figure.add_gridspec(2, 2, height_ratios=[3, 1], width_ratios=[4, 1])
+        self.ax_eeg = self.figure.add_subplot(grid[0, :])
+        self.ax_bands = self.figure.add_subplot(grid[1, 0])
+        self.ax_score = self.figure.add_subplot(grid[1, 1])
+        for ax in (self.ax_eeg, self.ax_bands, self.ax_score):
+            ax.set_facecolor(bg)
+            ax.tick_params(colors=fg, labelsize=7)
+            for spine in ax.spines.values():
+                spine.set_color("gray")
+
+        n_points = len(reader.eeg)
+        offsets = np.arange(N_CHANNELS)[::-1] * channel_span
+        self.offsets = offsets
+        self.eeg_lines = [self.ax_eeg.plot([], [], lw=0.6, animated=True)[0] for _ in range(N_CHANNELS)]
+        self.ax_eeg.set_xlim(0, n_points)
+        self.ax_eeg.set_ylim(-channel_span, N_CHANNELS * channel_span)
+        self.ax_eeg.set_yticks(offsets)
+        self.ax_eeg.set_yticklabels([f"ch{c + 1}" for c in range(N_CHANNELS)])
+        self.ax_eeg.set_xticks([])
+        self.ax_eeg.set_title("EEG", color=fg, fontsize=9)
+
+        self.band_bars = self.ax_bands.bar(list(BANDS), np.zeros(len(BANDS)), color="tab:cyan", animated=True)
+        self.ax_bands.set_ylim(0, 1)
+        self.ax_bands.set_title("Potencia relativa", color=fg, fontsize=9)
+
+        self.score_bar = self.ax_score.bar([0], [0], color="tab:green", animated=True)[0]
+        self.score_text = self.ax_score.text(0, 0.5, "--", ha="center", color=fg, fontsize=12, animated=True)
+        self.ax_score.set_xlim(-0.6, 0.6)
+        self.ax_score.set_ylim(0, 1)
+        self.ax_score.set_xticks([])
+        self.ax_score.set_title("Relajación", color=fg, fontsize=9)
+        self.figure.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.configure(bg=bg, highlightthickness=0)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.canvas.draw()
+
+    def on_draw(self, event=None):
+        # Fondo estático (ejes, etiquetas) guardado para restaurarlo en cada cuadro
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def artists(self):
+        return self.eeg_lines + list(self.band_bars) + [self.score_bar, self.score_text]
+
+    def draw_artists(self):
+        for artist in self.artists():
+            self.figure.draw_artist(artist)
+
+    def update_artists(self):
+        eeg, band_powers, score = self.reader.snapshot()
+        width_px = max(int(self.ax_eeg.bbox.width), 1)
+        if len(eeg) != self.ax_eeg.get_xlim()[1]:
+            # Cambió la frecuencia del stream: requiere redibujo completo
+            self.ax_eeg.set_xlim(0, len(eeg))
+            self.canvas.draw()
+        x, decimated = minmax_decimate(eeg, width_px)
+        for c, line in enumerate(self.eeg_lines):
+            line.set_data(x, np.clip(decimated[:, c], -self.channel_span / 2, self.channel_span / 2) + self.offsets[c])
+        for bar, value in zip(self.band_bars, band_powers):
+            bar.set_height(value)
+        if score is not None:
+            self.score_bar.set_height(min(max(score, 0.0), 1.0))
+            self.score_text.set_text(f"{score:.2f}")
+
+    def refresh(self):
+        if self.background is not None:
+            self.update_artists()
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.figure.bbox)
+        self.parent.after(self.interval_ms, self.refresh)
+
+    def start(self):
+        self.reader.start()
+        self.refresh()
+
+    def stop(self):
+        self.reader.stop()
@@ -2,20 +2,20 @@ import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
 from PIL import Image, ImageTk  # Necesita instalar Pillow: pip install pillow
-import serial  # Biblioteca para comunicación serial
+import threading
+import queue
+from DeviceCommandChannel import CommandClient
+from LiveSignalView import LSLLiveReader, LiveSignalPanel
 
-# Configuración de la conexión serial
-arduino = None
-try:
-    arduino = serial.Serial('COM8', 9600)  # Configuración de conexión en COM8 a 9600 baudios
-    print("Conexión con Arduino establecida.")
-except serial.SerialException:
-    print("No se pudo conectar al Arduino. Verifica el puerto COM y la conexión.")
+# Los triggers se envían al MultisensoryDeviceController, que es el único dueño del puerto serial.
+# Un worker en segundo plano hace el envío para que la interfaz nunca se bloquee.
+controller_client = CommandClient()
+trigger_queue = queue.Queue()
 
 # Configuración de la ventana principal
 root = tk.Tk()
 root.title("Sistema de Monitoreo Completo")
-root.geometry("1000x700")
+root.geometry("1500x750")
 root.configure(bg="black")  # Fondo negro
 
 # Fuentes y configuración visual
@@ -33,18 +33,37 @@ text_color = "white"
 last_trigger_time = None
 trigger_difference_var = tk.StringVar(value="0.00")
 
+# Worker que envía los triggers al controlador y reporta el resultado al hilo de Tk
+def trigger_worker():
+    while True:
+        trigger = trigger_queue.get()
+        if trigger is None:
+            break
+        try:
+            reply = controller_client.send(trigger)
+            ok = reply.startswith("OK")
+        except OSError as e:
+            reply = f"sin conexión con el controlador ({e})"
+            ok = False
+        root.after(0, report_trigger_result, trigger, ok, reply)
+
+# Mostrar en el registro si el controlador aceptó el trigger
+def report_trigger_result(trigger, ok, reply):
+    if ok:
+        print(f"Trigger '{trigger}' enviado al controlador.")  # Para depuración
+    else:
+        print(f"No se pudo enviar el trigger '{trigger}': {reply}")
+        triggers_log_box.insert(tk.END, f"No enviado: {reply}\n\n", "subtitle")
+        triggers_log_box.see(tk.END)
+
 # Función para enviar un trigger al Arduino y actualizar el registro
 def send_trigger(trigger):
     global last_trigger_time
     last_trigger_time = datetime.now()
     timestamp = last_trigger_time.strftime('%Y-%m-%d %H:%M:%S')
 
-    # Enviar el trigger al Arduino solo si la conexión se estableció
-    if arduino and arduino.is_open:
-        arduino.write((trigger + '\n').encode())  # Enviar el trigger con salto de línea
-        print(f"Trigger '{trigger}' enviado a Arduino.")  # Para depuración
-    else:
-        print("No se pudo enviar el trigger. Arduino no está conectado.")
+    # Encolar el trigger; el envío ocurre fuera del hilo de la interfaz
+    trigger_queue.put(trigger)
     
     # Restaurar texto y colores originales en el cronómetro
     timer_subtitle_label.config(text="Tiempo desde el último trigger", fg="gray")
@@ -152,9 +171,16 @@ create_trigger_button(leds_frame, "RELAX MEDIO", "medium_relaxation")
 create_trigger_button(leds_frame, "RELAX ALTO", "high_relaxation")
 create_trigger_button(leds_frame, "RELAX MÁXIMO", "very_high_relaxation")
 
+# Frame de señales en vivo (columna derecha): EEG, potencias por banda y puntaje de relajación
+live_frame = tk.LabelFrame(main_frame, text="SEÑALES EN VIVO", font=heading_font, bg="black", fg=text_color)
+live_frame.grid(row=0, column=2, sticky="nsew", padx=10, pady=10)
+live_panel = LiveSignalPanel(live_frame, LSLLiveReader(), max_fps=15)
+live_panel.widget.pack(fill="both", expand=True)
+
 # Configurar el grid para que las columnas se expandan uniformemente
 main_frame.grid_columnconfigure(0, weight=1)
 main_frame.grid_columnconfigure(1, weight=1)
+main_frame.grid_columnconfigure(2, weight=3)
 
 # Sección del cronómetro de tiempo entre triggers
 cronometro_frame = tk.LabelFrame(root, text="Cronómetro entre Triggers", font=heading_font, bg="black", fg=text_color)
@@ -183,7 +209,19 @@ triggers_log_box.tag_configure("subtitle", font=log_subtitle_font, foreground="g
 # Iniciar el cronómetro de tiempo entre triggers
 update_trigger_difference()
 
-# Configurar para cerrar la conexión serial al salir
-root.protocol("WM_DELETE_WINDOW", lambda: (arduino.close(), root.destroy()) if arduino and arduino.is_open else root.destroy())
+# Iniciar la lectura de LSL y el refresco del panel en vivo
+live_panel.start()
+
+# Iniciar el worker de envío de triggers
+threading.Thread(target=trigger_worker, daemon=True).start()
+
+# Configurar para cerrar la conexión con el controlador al salir
+def on_close():
+    trigger_queue.put(None)
+    live_panel.stop()
+    controller_client.close()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
 
 root.mainloop()
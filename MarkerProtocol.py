@@ -0,0 +1,92 @@
+from pylsl import StreamInfo, StreamOutlet, StreamInlet, resolve_byprop, local_clock
+
+# Stream multiplexado de eventos: cada muestra es [código, valor, timestamp de origen]
+EVENT_STREAM_NAME = 'relaxation_events'
+EVENT_STREAM_TYPE = 'Events'
+EVENT_CHANNELS = ['code', 'value', 'source_timestamp']
+
+# Estados de LEDs
+LOW_RELAXATION = 10
+MEDIUM_RELAXATION = 11
+HIGH_RELAXATION = 12
+VERY_HIGH_RELAXATION = 13
+# Aromas
+NEUTRAL_SCENT = 20
+SANDALWOOD_SCENT = 21
+MARINE_SCENT = 22
+HERBAL_SCENT = 23
+# Marcadores del experimento (START_VIDEO lleva el índice de video como valor)
+START_VIDEO = 30
+FADE_IN = 31
+FADE_OUT = 32
+# Puntaje actual de relajación (valor = puntaje); solo lo publica send_relaxation_state
+RELAXATION_SCORE = 40
+# Puntaje por video: código = base + índice de video, valor = puntaje
+VIDEO_SCORE_BASE = 100
+BEST_VIDEO_BASE = 200
+MAX_VIDEOS = 100
+
+LED_STATES = {
+    "low_relaxation": LOW_RELAXATION,
+    "medium_relaxation": MEDIUM_RELAXATION,
+    "high_relaxation": HIGH_RELAXATION,
+    "very_high_relaxation": VERY_HIGH_RELAXATION,
+}
+SCENTS = {
+    "neutral_scent": NEUTRAL_SCENT,
+    "sandalwood_scent": SANDALWOOD_SCENT,
+    "marine_scent": MARINE_SCENT,
+    "herbal_scent": HERBAL_SCENT,
+}
+MARKERS = {
+    "start_video": START_VIDEO,
+    "fade_in": FADE_IN,
+    "fade_out": FADE_OUT,
+    "relaxation_score": RELAXATION_SCORE,
+}
+
+EVENT_CODES = {**LED_STATES, **SCENTS, **MARKERS}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+LED_CODES = frozenset(LED_STATES.values())
+SCENT_CODES = frozenset(SCENTS.values())
+
+
+def make_event_outlet(source_id='relaxation_events_id'):
+    info = StreamInfo(EVENT_STREAM_NAME, EVENT_STREAM_TYPE, len(EVENT_CHANNELS), 0, 'double64', source_id)
+    channels = info.desc().append_child("channels")
+    for label in EVENT_CHANNELS:
+        channels.append_child("channel").append_child_value("label", label)
+    return StreamOutlet(info)
+
+
+def resolve_event_inlet(timeout=2.0):
+    """Inlet del stream de eventos, o None si no está disponible."""
+    streams = resolve_byprop('name', EVENT_STREAM_NAME, timeout=timeout)
+    return StreamInlet(streams[0]) if streams else None
+
+
+def encode(code, value=0.0, timestamp=None):
+    return [float(code), float(value), local_clock() if timestamp is None else float(timestamp)]
+
+
+def decode(sample):
+    """[código, valor, timestamp] -> (código entero, valor, timestamp)"""
+    return int(sample[0]), sample[1], sample[2]
+
+
+def event_code(name):
+    return EVENT_CODES.get(name)
+
+
+def video_score_code(video_index):
+    """Código del puntaje de un video (0 <= índice < MAX_VIDEOS)."""
+    if not 0 <= video_index < MAX_VIDEOS:
+        raise ValueError(f"Índice de video fuera de rango: {video_index}")
+    return VIDEO_SCORE_BASE + video_index
+
+
+def best_video_code(video_index):
+    """Código del mejor video seleccionado (0 <= índice < MAX_VIDEOS)."""
+    if not 0 <= video_index < MAX_VIDEOS:
+        raise ValueError(f"Índice de video fuera de rango: {video_index}")
+    return BEST_VIDEO_BASE + video_index
@@ -1,31 +1,44 @@
 import serial
+import argparse
+import os
 from pylsl import StreamInlet, resolve_stream
 from threading import Lock, Thread
+from queue import Queue, Empty
 import time
 import datetime
 import io
 import csv
 import logging
+from DeviceCommandChannel import CommandServer, COMMAND_PORT
+from AsyncLogging import setup_logging
+import MarkerProtocol as markers
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('device_controller.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configuración de logging: archivo y consola se escriben desde un hilo en segundo plano
+setup_logging('device_controller.log')
+
+LED_TRIGGERS = frozenset(markers.LED_STATES)
+AROMA_TRIGGERS = frozenset(markers.SCENTS)
 
 class MultisensoryDeviceController:
-    def __init__(self, com_port='COM8', baud_rate=9600):
+    def __init__(self, com_port='COM8', baud_rate=9600, command_port=COMMAND_PORT, legacy_streams=False):
         self.com_port = com_port
         self.baud_rate = baud_rate
+        self.command_port = command_port
+        # Leer los estados como texto desde eeg_stream / relaxation_stream en lugar del stream de eventos
+        # (solo con un experimento lanzado con legacy_streams=True)
+        self.legacy_streams = legacy_streams
         self.serial_lock = Lock()
         self.ser = None
         self.last_ping_time = time.time()
         self.ping_interval = 5
         self.running = True
+        self.event_inlet = None
+        self.eeg_inlet = None
+        self.relaxation_inlet = None
+
+        # Cola única de comandos hacia el Arduino: solo el worker serial escribe en el puerto
+        self.command_queue = Queue()
+        self.command_server = None
         
         # Configuración de archivo en memoria para logging
         self.memory_file = io.StringIO()
@@ -48,23 +61,44 @@ class MultisensoryDeviceController:
     def setup_serial(self):
         """Configura la conexión serial con reintentos."""
         max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                self.ser = serial.Serial(self.com_port, self.baud_rate, timeout=1)
-                logging.info(f"Conexión serial establecida en {self.com_port} a {self.baud_rate} baudios")
-                return True
-            except serial.SerialException as e:
-                logging.error(f'Intento {attempt + 1}/{max_attempts} - Error al abrir el puerto serial: {e}')
-                if attempt < max_attempts - 1:
-                    time.sleep(2)
-        return False
+        # Se llama también desde el hilo de ping: el lock evita cerrar el puerto
+        # mientras serial_worker está escribiendo o esperando la respuesta
+        with self.serial_lock:
+            # Cerrar el puerto anterior antes de reabrirlo; si sigue abierto el SO niega el acceso
+            if self.ser and self.ser.is_open:
+                try:
+                    self.ser.close()
+                except serial.SerialException:
+                    pass
+            for attempt in range(max_attempts):
+                try:
+                    self.ser = serial.Serial(self.com_port, self.baud_rate, timeout=1)
+                    logging.info(f"Conexión serial establecida en {self.com_port} a {self.baud_rate} baudios")
+                    return True
+                except serial.SerialException as e:
+                    logging.error(f'Intento {attempt + 1}/{max_attempts} - Error al abrir el puerto serial: {e}')
+                    if attempt < max_attempts - 1:
+                        time.sleep(2)
+            return False
 
     def setup_lsl_streams(self):
         """Configura las conexiones LSL con reintentos."""
+        if not self.legacy_streams:
+            # El controlador suele arrancar antes que el experimento: esperar al stream de eventos.
+            # El experimento crea eeg_stream / relaxation_stream aunque ya no publica estados en ellos,
+            # así que no se usan como respaldo automático
+            logging.info(f"Esperando el stream '{markers.EVENT_STREAM_NAME}'...")
+            while self.running:
+                self.event_inlet = markers.resolve_event_inlet(timeout=2.0)
+                if self.event_inlet:
+                    logging.info(f"Conexión establecida con el stream '{markers.EVENT_STREAM_NAME}'")
+                    return True
+            return False
+
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                logging.info("Buscando streams LSL...")
+                logging.info("Buscando streams LSL de texto...")
                 eeg_streams = resolve_stream('name', 'eeg_stream')
                 relaxation_streams = resolve_stream('name', 'relaxation_stream')
 
@@ -120,7 +154,7 @@ class MultisensoryDeviceController:
         if trigger == self.current_led_state:
             return  # Evitar comandos redundantes
 
-        if trigger in ["low_relaxation", "medium_relaxation", "high_relaxation", "very_high_relaxation"]:
+        if trigger in LED_TRIGGERS:
             if self.send_to_arduino(trigger):
                 self.current_led_state = trigger
                 logging.info(f"Estado LED actualizado a: {trigger}")
@@ -132,13 +166,57 @@ class MultisensoryDeviceController:
         if trigger == self.current_aroma_state:
             return  # Evitar comandos redundantes
 
-        if trigger in ["neutral_scent", "sandalwood_scent", "marine_scent", "herbal_scent"]:
+        if trigger in AROMA_TRIGGERS:
             if self.send_to_arduino(trigger):
                 self.current_aroma_state = trigger
                 logging.info(f"Estado de aroma actualizado a: {trigger}")
         else:
             logging.warning(f"Trigger de aroma no reconocido: {trigger}")
 
+    def queue_command(self, trigger, source="lsl"):
+        """Encola un trigger para el worker serial. Devuelve False si el trigger no es reconocido."""
+        if trigger not in LED_TRIGGERS and trigger not in AROMA_TRIGGERS:
+            logging.warning(f"Trigger no reconocido desde {source}: {trigger}")
+            return False
+        self.command_queue.put((trigger, source))
+        return True
+
+    def queue_manual_command(self, trigger):
+        """Entrada del canal local de comandos (MainDashboard)."""
+        return self.queue_command(trigger, source="manual")
+
+    def serial_worker(self):
+        """Consume la cola de comandos y los envía al Arduino uno a uno."""
+        while self.running:
+            try:
+                trigger, source = self.command_queue.get(timeout=0.1)
+            except Empty:
+                continue
+            try:
+                if source == "manual":
+                    # Los triggers manuales se envían siempre, aunque repitan el estado actual
+                    if self.send_to_arduino(trigger):
+                        if trigger in LED_TRIGGERS:
+                            self.current_led_state = trigger
+                        else:
+                            self.current_aroma_state = trigger
+                        logging.info(f"Trigger manual aplicado: {trigger}")
+                elif trigger in LED_TRIGGERS:
+                    self.process_led_trigger(trigger)
+                else:
+                    self.process_aroma_trigger(trigger)
+            except Exception as e:
+                logging.error(f"Error en serial_worker: {e}")
+
+    def start_command_server(self):
+        """Abre el canal local para que el dashboard envíe triggers sin abrir el puerto serial."""
+        try:
+            self.command_server = CommandServer(self.queue_manual_command, port=self.command_port)
+            self.command_server.start()
+            logging.info(f"Canal de comandos local escuchando en el puerto {self.command_port}")
+        except OSError as e:
+            logging.error(f"No se pudo abrir el canal de comandos local: {e}")
+
     def maintain_connection(self):
         """Mantiene la conexión con el Arduino mediante pings periódicos."""
         while self.running:
@@ -161,18 +239,33 @@ class MultisensoryDeviceController:
         ping_thread.daemon = True
         ping_thread.start()
 
+        # Iniciar worker serial y canal de comandos local
+        serial_thread = Thread(target=self.serial_worker)
+        serial_thread.daemon = True
+        serial_thread.start()
+        self.start_command_server()
+
         logging.info("Iniciando procesamiento de streams...")
         try:
             while self.running:
+                if self.event_inlet:
+                    # Un solo stream multiplexado: se decodifica por código, sin parsear texto
+                    events, _ = self.event_inlet.pull_chunk(timeout=0.1)
+                    for event in events:
+                        code, _, _ = markers.decode(event)
+                        if code in markers.LED_CODES or code in markers.SCENT_CODES:
+                            self.queue_command(markers.EVENT_NAMES[code])
+                    continue
+
                 # Procesar stream de EEG para LEDs
                 eeg_sample, _ = self.eeg_inlet.pull_sample(timeout=0.1)
                 if eeg_sample:
-                    self.process_led_trigger(eeg_sample[0])
+                    self.queue_command(eeg_sample[0])
 
                 # Procesar stream de Relaxation para aromas
                 relaxation_sample, _ = self.relaxation_inlet.pull_sample(timeout=0.1)
                 if relaxation_sample:
-                    self.process_aroma_trigger(relaxation_sample[0])
+                    self.queue_command(relaxation_sample[0])
 
                 time.sleep(0.1)
 
@@ -186,6 +279,9 @@ class MultisensoryDeviceController:
     def cleanup(self):
         """Limpia y cierra las conexiones."""
         self.running = False
+        if self.command_server:
+            self.command_server.shutdown()
+            self.command_server.server_close()
         if self.ser and self.ser.is_open:
             # Enviar comando de apagado a Arduino si es necesario
             self.send_to_arduino("shutdown")
@@ -204,9 +300,17 @@ class MultisensoryDeviceController:
         logging.info("Sistema apagado correctamente")
 
 def main():
+    parser = argparse.ArgumentParser(description="Controlador de LEDs y aromas por puerto serial")
+    parser.add_argument("--port", default=os.environ.get("RELAXATION_SERIAL_PORT", "COM8"),
+                        help="Puerto serial del Arduino (o el pty de VirtualArduino)")
+    parser.add_argument("--baud", type=int, default=9600, help="Velocidad del puerto serial")
+    parser.add_argument("--command-port", type=int, default=COMMAND_PORT, help="Puerto TCP local para el dashboard")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Leer eeg_stream / relaxation_stream (experimento con legacy_streams=True)")
+    args = parser.parse_args()
     try:
         logging.info("Iniciando MultisensoryDeviceController...")
-        controller = MultisensoryDeviceController()
+        controller = MultisensoryDeviceController(args.port, args.baud, args.command_port, args.legacy)
         controller.run()
     except KeyboardInterrupt:
         logging.info("Inicio interrumpido por el usuario")
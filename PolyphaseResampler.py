@@ -0,0 +1,67 @@
+from fractions import Fraction
+import numpy as np
+from scipy import signal
+
+
+class StreamingPolyphaseResampler:
+    """Remuestreo racional (fs_in * up / down) con filtro anti-aliasing FIR, muestra a muestra o por bloques.
+
+    Equivalente en streaming a scipy.signal.resample_poly: conserva las ultimas muestras
+    de entrada entre llamadas y solo evalua la fase del filtro que corresponde a cada salida.
+    """
+
+    def __init__(self, fs_in, fs_out, n_channels, beta=5.0):
+        ratio = Fraction(fs_out) / Fraction(fs_in)
+        ratio = ratio.limit_denominator(1000)
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+        self.fs_in = fs_in
+        self.fs_out = fs_in * self.up / self.down
+        self.n_channels = n_channels
+
+        # Mismo diseño que resample_poly: corte en la menor de las dos Nyquist
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        h = signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', beta)) * self.up
+        taps_per_phase = -(-len(h) // self.up)
+        h = np.concatenate((h, np.zeros(taps_per_phase * self.up - len(h))))
+        # polyphase[p, i] = h[p + up * i]
+        self.polyphase = h.reshape(taps_per_phase, self.up).T.copy()
+        self.taps_per_phase = taps_per_phase
+        # Retardo de grupo del FIR (fase lineal, centrado en half_len a la tasa interpolada)
+        self.delay = half_len / (fs_in * self.up)
+
+        self.history = np.zeros((taps_per_phase - 1, n_channels))
+        self.n_in = 0       # Muestras de entrada consumidas
+        self.n_out = 0      # Muestras de salida producidas
+
+    def output_timestamps(self, n, last_input_timestamp):
+        """Timestamps de las últimas `n` salidas, dado el timestamp de la última muestra de entrada.
+
+        La salida k corresponde al instante de entrada k * down / up, desplazado por el retardo del filtro.
+        """
+        ks = np.arange(self.n_out - n, self.n_out)
+        behind = (self.n_in - 1 - ks * self.down / self.up) / self.fs_in
+        return last_input_timestamp - behind - self.delay
+
+    def process(self, block):
+        """Recibe un bloque (n, canales) y devuelve las muestras de salida disponibles (m, canales)."""
+        block = np.asarray(block, dtype=float).reshape(-1, self.n_channels)
+        ext = np.concatenate((self.history, block))
+        base = self.n_in - (self.taps_per_phase - 1)  # indice global de ext[0]
+        self.n_in += block.shape[0]
+
+        # Salidas k cuya ultima muestra de entrada floor(k*down/up) ya llego
+        k_end = -(-self.n_in * self.up // self.down)
+        ks = np.arange(self.n_out, k_end)
+        self.n_out = k_end
+        self.history = ext[ext.shape[0] - (self.taps_per_phase - 1):]
+        if ks.size == 0:
+            return np.empty((0, self.n_channels))
+
+        pos = ks * self.down
+        newest = pos // self.up - base
+        phases = pos % self.up
+        idx = newest[:, None] - np.arange(self.taps_per_phase)[None, :]
+        windows = ext[idx]                                   # (m, taps, canales)
+        return np.einsum('mt,mtc->mc', self.polyphase[phases], windows)
@@ -1,24 +1,37 @@
 import numpy as np
-from scipy.signal import butter, lfilter
+from scipy.signal import sosfilt
 from pylsl import StreamInlet, resolve_stream, StreamOutlet, StreamInfo
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Input
 from tensorflow.keras.optimizers import Adam
 import tensorflow as tf
 import time
+import logging
+from AsyncLogging import setup_logging
+import MarkerProtocol as markers
+import argparse
+from StageProfiler import StageProfiler, add_profiling_arguments
+from FilterBank import bandpass_sos
+from EEGFeatures import weighted_channel_mean
 
 # Configuración para reducir mensajes de TensorFlow
 tf.get_logger().setLevel('ERROR')
 
 class RealTimeRelaxationExperiment:
-    def __init__(self, participant_id, num_videos, fs=100):
+    def __init__(self, participant_id, num_videos, fs=None, legacy_streams=False, profiler=None):
         self.participant_id = participant_id
         self.num_videos = num_videos
         self.video_scores = {}
-        self.fs = fs
+        # Publicar también los estados como texto en eeg_stream / relaxation_stream (consumidores antiguos)
+        self.legacy_streams = legacy_streams
+        # Perfilado opcional de collect_power_data (deshabilitado no tiene costo apreciable)
+        self.profiler = profiler or StageProfiler("experiment")
         
         # Stream original para marcadores de video
         self.marker_outlet = self.setup_marker_stream()
+
+        # Stream multiplexado de eventos numéricos (LEDs, aromas, marcadores y puntajes)
+        self.event_outlet = markers.make_event_outlet()
         
         # Stream para enviar estados de LEDs
         self.eeg_outlet = self.setup_eeg_stream()
@@ -31,6 +44,11 @@ class RealTimeRelaxationExperiment:
         
         # Inlet para datos EEG
         self.inlet = self.setup_power_inlet()
+
+        # Usar la frecuencia real publicada por el stream si no se indica una explícita
+        if fs is None:
+            fs = self.inlet.info().nominal_srate() or 100
+        self.fs = int(round(fs))
         
         self.model = self.create_model()
         self.current_aroma = None
@@ -73,22 +91,20 @@ class RealTimeRelaxationExperiment:
     def reset_model(self):
         self.model = self.create_model()
 
-    def send_trigger(self, trigger_name):
+    def send_trigger(self, trigger_name, code=None, value=0.0):
         """Envía triggers a todos los streams relevantes."""
         # Enviar al stream de marcadores de video
         self.marker_outlet.push_sample([trigger_name])
-        print(f"Video marker sent: {trigger_name}")
+        logging.info("Video marker sent: %s", trigger_name)
 
-        # Si el trigger contiene un score, actualizar LED y aroma
-        if "score:" in trigger_name:
-            try:
-                score = float(trigger_name.split(":")[-1])
-                self.send_relaxation_state(score)
-            except ValueError:
-                print(f"No se pudo extraer score del trigger: {trigger_name}")
+        # Misma información en el stream de eventos, sin que nadie tenga que parsear el texto
+        if code is not None:
+            self.event_outlet.push_sample(markers.encode(code, value))
 
     def send_relaxation_state(self, relaxation_score):
         """Envía el estado de relajación para LEDs y aromas."""
+        self.event_outlet.push_sample(markers.encode(markers.RELAXATION_SCORE, relaxation_score))
+
         # Determinar y enviar estado de LED
         if relaxation_score > 0.9:
             led_state = "very_high_relaxation"
@@ -101,8 +117,10 @@ class RealTimeRelaxationExperiment:
 
         if led_state != self.current_led_state:
             self.current_led_state = led_state
-            self.eeg_outlet.push_sample([led_state])
-            print(f"LED state sent: {led_state}")
+            self.event_outlet.push_sample(markers.encode(markers.LED_STATES[led_state]))
+            if self.legacy_streams:
+                self.eeg_outlet.push_sample([led_state])
+            logging.info("LED state sent: %s", led_state)
             
             # También enviar al stream de Unity
             self.unity_outlet.push_sample([led_state])
@@ -117,17 +135,19 @@ class RealTimeRelaxationExperiment:
 
         if aroma != self.current_aroma:
             self.current_aroma = aroma
-            self.relaxation_outlet.push_sample([aroma])
-            print(f"Aroma state sent: {aroma}")
+            self.event_outlet.push_sample(markers.encode(markers.SCENTS[aroma]))
+            if self.legacy_streams:
+                self.relaxation_outlet.push_sample([aroma])
+            logging.info("Aroma state sent: %s", aroma)
 
     def run_trial(self, video_index, duration=30):
         self.reset_model()
         time.sleep(1)
 
         # Enviar trigger para el inicio del video y el fade_in
-        self.send_trigger(f"start_video_{video_index}")
+        self.send_trigger(f"start_video_{video_index}", markers.START_VIDEO, video_index)
         time.sleep(1)  # Espera breve antes de enviar fade_in
-        self.send_trigger("fade_in")
+        self.send_trigger("fade_in", markers.FADE_IN)
 
         # Recolectar datos de EEG durante la duración del video menos tiempo para fade_out
         fade_out_time = 2  # Segundos antes de que termine el video para enviar fade_out
@@ -142,11 +162,13 @@ class RealTimeRelaxationExperiment:
         self.send_relaxation_state(relaxation_score)
 
         # Enviar trigger fade_out antes de que termine el video
-        self.send_trigger("fade_out")
+        self.send_trigger("fade_out", markers.FADE_OUT)
         time.sleep(fade_out_time)  # Espera para que termine el video después del fade_out
 
         # Enviar el resultado del puntaje de relajación de este video como trigger
-        self.send_trigger(f"video_{video_index}_score:{relaxation_score}")
+        # (LEDs, aromas y RELAXATION_SCORE ya se enviaron arriba con send_relaxation_state)
+        self.send_trigger(f"video_{video_index}_score:{relaxation_score}",
+                          markers.video_score_code(video_index), relaxation_score)
 
     def collect_power_data(self, duration=30):
         samples = []
@@ -154,6 +176,7 @@ class RealTimeRelaxationExperiment:
 
         print(f"Collecting EEG data for {duration} seconds...")
         while time.time() - start_time < duration:
+            self.profiler.tick()
             sample, timestamp = self.inlet.pull_sample()
             if sample:
                 alpha_theta_data = sample[16:24] + sample[8:16]
@@ -162,25 +185,14 @@ class RealTimeRelaxationExperiment:
         return np.array(samples) if samples else np.zeros((1, 16))
 
     def calculate_bandpower(self, data, lowcut, highcut):
-        nyquist = 0.5 * self.fs
-        low = lowcut / nyquist
-        high = highcut / nyquist
-        b, a = butter(4, [low, high], btype='band')
-        filtered_data = lfilter(b, a, data)
+        sos = bandpass_sos(lowcut, highcut, self.fs, order=4)
+        filtered_data = sosfilt(sos, data)
         bandpower = np.mean(filtered_data ** 2, axis=0)
         return bandpower
 
     def calculate_weighted_relaxation_score(self, eeg_data):
-        frontal_indices = [0, 1, 2]
-        central_indices = [3, 4]
-        parietal_indices = [5, 6, 7]
-
-        frontal_data = eeg_data[:, frontal_indices] * 1.0
-        central_data = eeg_data[:, central_indices] * 1.2
-        parietal_data = eeg_data[:, parietal_indices] * 1.5
-
-        weighted_data = np.concatenate([frontal_data, central_data, parietal_data], axis=1)
-        return weighted_data.mean(axis=1)
+        # Frontal x1.0, central x1.2, parietal x1.5 (compartido con el reprocesamiento offline)
+        return weighted_channel_mean(eeg_data)
 
     def calculate_interval_based_relaxation(self, eeg_data):
         interval_duration = 5
@@ -197,7 +209,7 @@ class RealTimeRelaxationExperiment:
             history = self.model.fit(interval_data, labels, epochs=1, batch_size=5, verbose=0)
             loss = history.history['loss'][0]
             accuracy = history.history['accuracy'][0]
-            print(f"Interval {i + 1}/{num_intervals} - Loss: {loss:.4f}, Accuracy: {accuracy:.4f}")
+            logging.info("Interval %d/%d - Loss: %.4f, Accuracy: %.4f", i + 1, num_intervals, loss, accuracy)
 
             score = self.model.predict(interval_data)
             interval_scores.append(np.mean(score))
@@ -216,8 +228,9 @@ class RealTimeRelaxationExperiment:
         best_score = self.video_scores[best_video]
         print(f"Best video selected: {best_video} with score {best_score}")
         
-        # Enviar el resultado final del mejor video seleccionado
-        self.send_trigger(f"best_video_{best_video}_score:{best_score}")
+        # Enviar el resultado final del mejor video seleccionado; play_best_video actualiza LEDs y aromas
+        self.send_trigger(f"best_video_{best_video}_score:{best_score}",
+                          markers.best_video_code(best_video), best_score)
         return best_video
 
     def play_best_video(self, video_index, duration=90):
@@ -229,16 +242,16 @@ class RealTimeRelaxationExperiment:
         self.send_relaxation_state(best_score)
 
         # Enviar trigger para el inicio del video y el fade_in
-        self.send_trigger(f"start_video_{video_index}")
+        self.send_trigger(f"start_video_{video_index}", markers.START_VIDEO, video_index)
         time.sleep(1)
-        self.send_trigger("fade_in")
+        self.send_trigger("fade_in", markers.FADE_IN)
 
         # Duración del video menos el tiempo para enviar fade_out
         fade_out_time = 2
         time.sleep(duration - fade_out_time)
 
         # Enviar trigger fade_out antes de que termine el video
-        self.send_trigger("fade_out")
+        self.send_trigger("fade_out", markers.FADE_OUT)
         time.sleep(fade_out_time)
 
     def start_experiment(self):
@@ -253,8 +266,15 @@ class RealTimeRelaxationExperiment:
 
 # Ejecución del sistema
 if __name__ == "__main__":
+    parser = add_profiling_arguments(argparse.ArgumentParser(description="Experimento de relajación en tiempo real"))
+    parser.add_argument("--legacy-streams", action="store_true",
+                        help="Publicar también LEDs y aromas como texto (MultisensoryDeviceController --legacy)")
+    args = parser.parse_args()
+    setup_logging('relaxation_experiment.log')
     try:
-        experiment = RealTimeRelaxationExperiment(participant_id='P001', num_videos=5)
+        experiment = RealTimeRelaxationExperiment(participant_id='P001', num_videos=5,
+                                                  legacy_streams=args.legacy_streams,
+                                                  profiler=StageProfiler.from_args("experiment", args))
         experiment.start_experiment()
     except KeyboardInterrupt:
         print("\nExperimento interrumpido por el usuario.")
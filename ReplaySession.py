@@ -0,0 +1,147 @@
+import argparse
+import ast
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from pylsl import StreamInfo, StreamOutlet, local_clock
+from EEGFeatures import BANDS, band_powers
+import MarkerProtocol as markers
+
+N_CHANNELS = 8
+
+
+def _marker_text(value):
+    """Las columnas de triggers se guardaron como str(lista) o 'None'; devuelve el texto del marcador o None."""
+    if not isinstance(value, str) or value in ("None", "nan", "0", ""):
+        return None
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+    if isinstance(parsed, (list, tuple)):
+        return str(parsed[0]) if parsed else None
+    return str(parsed)
+
+
+def load_recording(csv_path, chunk_size=50000):
+    """Convierte la grabación a un .npy (timestamp + canales) que se abre con memmap, más un índice de marcadores.
+
+    La conversión se hace una sola vez; las siguientes reproducciones abren directamente la caché.
+    """
+    base = os.path.splitext(csv_path)[0]
+    npy_path = base + ".replay.npy"
+    markers_path = base + ".replay_markers.json"
+    if not (os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(csv_path)
+            and os.path.exists(markers_path)):
+        blocks = []
+        marker_rows = []
+        row = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            sample_cols = [c for c in chunk.columns if c.startswith("Sample")][:N_CHANNELS]
+            blocks.append(chunk[["Timestamp"] + sample_cols].to_numpy(dtype=np.float64))
+            # EEG_Trigger (LEDs) y Scent (aromas) vuelven a publicarse como eventos numéricos
+            for column, kind in (("Trigger", "trigger"), ("Marker", "marker"),
+                                 ("EEG_Trigger", "eeg_trigger"), ("Scent", "eeg_trigger")):
+                if column not in chunk.columns:
+                    continue
+                for offset, value in enumerate(chunk[column].astype(str)):
+                    text = _marker_text(value)
+                    if text is not None:
+                        marker_rows.append([row + offset, kind, text])
+            row += len(chunk)
+        data = np.concatenate(blocks) if blocks else np.empty((0, N_CHANNELS + 1))
+        np.save(npy_path, data)
+        with open(markers_path, "w", encoding="utf-8") as f:
+            json.dump(marker_rows, f)
+    data = np.load(npy_path, mmap_mode="r")
+    with open(markers_path, encoding="utf-8") as f:
+        marker_rows = json.load(f)
+    return data, marker_rows
+
+
+def make_outlets(eeg_name, fs, with_psd, psd_window=0.4):
+    eeg_info = StreamInfo(eeg_name, 'EEG', N_CHANNELS, fs, 'float32', 'replay_eeg')
+    outlets = {"eeg": StreamOutlet(eeg_info)}
+    if with_psd:
+        # Una muestra de PSD por ventana, igual que el stage en modo welch
+        psd_info = StreamInfo('AURAPSD', 'PSD', N_CHANNELS * len(BANDS), 1.0 / psd_window, 'float32', 'replay_psd')
+        outlets["psd"] = StreamOutlet(psd_info)
+    outlets["trigger"] = StreamOutlet(StreamInfo('relaxation_stream', 'Markers', 1, 0, 'string', 'replay_relaxation'))
+    outlets["marker"] = StreamOutlet(StreamInfo('unity_stream', 'Markers', 1, 0, 'string', 'replay_unity'))
+    outlets["events"] = markers.make_event_outlet('replay_events')
+    return outlets
+
+
+def replay(data, marker_rows, outlets, fs, speed=1.0, chunk_seconds=0.1, psd_window=0.4, loops=1):
+    """Republica la grabación por bloques respetando la temporización relativa (dividida por `speed`; 0 = sin esperas)."""
+    n = len(data)
+    if n == 0:
+        return
+    timestamps = np.asarray(data[:, 0])
+    rel = timestamps - timestamps[0]
+    chunk = max(1, int(round(fs * chunk_seconds)))
+    window = int(round(fs * psd_window))
+
+    # Marcadores agrupados por fila para insertarlos en orden determinista después de su bloque de EEG
+    by_row = {}
+    for row, kind, text in marker_rows:
+        by_row.setdefault(row, []).append((kind, text))
+    marker_row_index = np.array(sorted(by_row), dtype=np.int64)
+
+    for _ in range(loops):
+        lsl_start = local_clock()
+        wall_start = time.perf_counter()
+        for start in range(0, n, chunk):
+            end = min(start + chunk, n)
+            if speed > 0:
+                delay = wall_start + rel[end - 1] / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            stamps = lsl_start + rel[start:end] / (speed if speed > 0 else 1.0)
+            outlets["eeg"].push_chunk(np.asarray(data[start:end, 1:]).tolist(), stamps.tolist())
+
+            if "psd" in outlets:
+                # Una salida de PSD por cada ventana que termina dentro de este bloque
+                for w_end in range((start // window + 1) * window, end + 1, window):
+                    psd = band_powers(np.asarray(data[w_end - window:w_end, 1:]), fs)
+                    outlets["psd"].push_sample(psd.tolist(), float(stamps[w_end - 1 - start]))
+
+            lo, hi = np.searchsorted(marker_row_index, [start, end])
+            for row in marker_row_index[lo:hi]:
+                stamp = float(stamps[row - start])
+                for kind, text in by_row[int(row)]:
+                    if kind == "eeg_trigger":
+                        code = markers.event_code(text)
+                        if code is not None:
+                            outlets["events"].push_sample(markers.encode(code, 0.0, stamp), stamp)
+                    else:
+                        outlets[kind].push_sample([text], stamp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce una sesión grabada hacia LSL con los nombres de stream originales")
+    parser.add_argument("recording", help="CSV grabado por EEG_Trigger_saver_Relaxation.py")
+    parser.add_argument("--speed", type=float, default=1.0, help="Velocidad de reproducción (1, 10...; 0 = lo más rápido posible)")
+    parser.add_argument("--fs", type=float, default=250, help="Frecuencia de muestreo de la grabación")
+    parser.add_argument("--eeg-name", default="AURAKalmanFilteredEEG", help="Nombre del stream EEG publicado")
+    parser.add_argument("--chunk", type=float, default=0.1, help="Duración de cada bloque enviado (s)")
+    parser.add_argument("--no-psd", action="store_true", help="No publicar AURAPSD (por ejemplo si corre el stage real)")
+    parser.add_argument("--loops", type=int, default=1, help="Número de repeticiones")
+    parser.add_argument("--wait", type=float, default=2.0, help="Segundos de espera para que se conecten los consumidores")
+    args = parser.parse_args()
+
+    data, marker_rows = load_recording(args.recording)
+    print(f"{len(data)} muestras y {len(marker_rows)} marcadores cargados de '{args.recording}'")
+    outlets = make_outlets(args.eeg_name, args.fs, not args.no_psd)
+    time.sleep(args.wait)
+
+    start_time = time.perf_counter()
+    replay(data, marker_rows, outlets, args.fs, args.speed, args.chunk, loops=args.loops)
+    elapsed = time.perf_counter() - start_time
+    print(f"Reproducción terminada en {elapsed:.2f} s ({len(data) * args.loops / elapsed:.0f} muestras/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+# Cabecera del ring buffer: [secuencia de escritura, canales, capacidad] en int64 y fs en float64
+HEADER_SLOTS = 4
+SEQ, CHANNELS, CAPACITY, FS = range(HEADER_SLOTS)
+HEADER_BYTES = HEADER_SLOTS * 8
+
+# Segmentos creados por este proceso (ya registrados en su resource_tracker como propios)
+_OWNED_SEGMENTS = set()
+
+
+class SharedMemoryRing:
+    """Ring buffer float32 en memoria compartida para intercambiar bloques de muestras entre procesos locales."""
+
+    def __init__(self, name, n_channels=None, capacity=None, fs=0, create=False):
+        self.name = name
+        if create:
+            data_bytes = capacity * n_channels * 4
+            ts_bytes = capacity * 8
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + data_bytes + ts_bytes)
+            except FileExistsError:
+                # Segmento huerfano de una ejecucion anterior: se reutiliza
+                old = shared_memory.SharedMemory(name=name)
+                old.close()
+                old.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + data_bytes + ts_bytes)
+            _OWNED_SEGMENTS.add(self.shm._name)
+            self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+            self.header[:] = 0
+            self.header[CHANNELS] = n_channels
+            self.header[CAPACITY] = capacity
+            # fs no siempre es entera (--out-fs): se guarda como float64 en su propia ranura
+            np.ndarray((HEADER_SLOTS,), dtype=np.float64, buffer=self.shm.buf)[FS] = fs
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if os.name == "posix" and self.shm._name not in _OWNED_SEGMENTS:
+                # En POSIX el resource_tracker del lector borraría el segmento del escritor al salir;
+                # solo el creador lo elimina
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.owner = create
+        self.n_channels = int(self.header[CHANNELS])
+        self.capacity = int(self.header[CAPACITY])
+        self.fs = float(np.ndarray((HEADER_SLOTS,), dtype=np.float64, buffer=self.shm.buf)[FS])
+        data_bytes = self.capacity * self.n_channels * 4
+        self.data = np.ndarray((self.capacity, self.n_channels), dtype=np.float32,
+                               buffer=self.shm.buf, offset=HEADER_BYTES)
+        self.timestamps = np.ndarray((self.capacity,), dtype=np.float64,
+                                     buffer=self.shm.buf, offset=HEADER_BYTES + data_bytes)
+        # Secuencia del lector: empieza en la posicion actual del escritor
+        self.read_seq = int(self.header[SEQ])
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, name, n_channels, capacity, fs=0):
+        return cls(name, n_channels=n_channels, capacity=capacity, fs=fs, create=True)
+
+    @classmethod
+    def attach(cls, name, timeout=None):
+        """Se conecta a un ring existente, esperando a que el escritor lo cree."""
+        start_time = time.time()
+        while True:
+            try:
+                return cls(name)
+            except FileNotFoundError:
+                if timeout is not None and time.time() - start_time > timeout:
+                    raise
+                time.sleep(0.1)
+
+    def write(self, block, timestamps=None):
+        """Copia un bloque (n, canales) al ring y publica la nueva secuencia."""
+        block = np.asarray(block, dtype=np.float32).reshape(-1, self.n_channels)
+        total = block.shape[0]
+        n = total
+        seq = int(self.header[SEQ])
+        if n > self.capacity:
+            # Solo caben las últimas `capacity` muestras; la secuencia avanza igual por el bloque completo
+            # para que el lector cuente las descartadas en `dropped`
+            block = block[-self.capacity:]
+            if timestamps is not None:
+                timestamps = timestamps[-self.capacity:]
+            n = self.capacity
+        start = (seq + total - n) % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        self.data[:n - first] = block[first:]
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.float64)
+            self.timestamps[start:start + first] = timestamps[:first]
+            self.timestamps[:n - first] = timestamps[first:]
+        # La secuencia se publica despues de los datos para que el lector nunca vea un bloque a medias
+        self.header[SEQ] = seq + total
+
+    def available(self):
+        return int(self.header[SEQ]) - self.read_seq
+
+    def read(self, max_samples=None):
+        """Devuelve (muestras, timestamps) nuevos desde la ultima lectura.
+
+        Si el bloque es contiguo en el ring se devuelven vistas sin copia; son validas
+        hasta que el escritor da una vuelta completa al buffer.
+        """
+        write_seq = int(self.header[SEQ])
+        pending = write_seq - self.read_seq
+        if pending <= 0:
+            return None, None
+        if pending > self.capacity:
+            # El lector se quedo atras: se descartan las muestras sobrescritas
+            self.dropped += pending - self.capacity
+            self.read_seq = write_seq - self.capacity
+            pending = self.capacity
+        if max_samples is not None:
+            pending = min(pending, max_samples)
+        start = self.read_seq % self.capacity
+        end = start + pending
+        if end <= self.capacity:
+            samples = self.data[start:end]
+            stamps = self.timestamps[start:end]
+        else:
+            samples = np.concatenate((self.data[start:], self.data[:end - self.capacity]))
+            stamps = np.concatenate((self.timestamps[start:], self.timestamps[:end - self.capacity]))
+        self.read_seq += pending
+        return samples, stamps
+
+    def wait(self, poll_interval=0.0002, timeout=None):
+        """Espera hasta que haya muestras nuevas y las devuelve."""
+        start_time = time.time()
+        while self.available() <= 0:
+            if timeout is not None and time.time() - start_time > timeout:
+                return None, None
+            time.sleep(poll_interval)
+        return self.read()
+
+    def close(self):
+        # Liberar las vistas numpy antes de cerrar el segmento
+        del self.header, self.data, self.timestamps
+        self.shm.close()
+        if self.owner:
+            _OWNED_SEGMENTS.discard(self.shm._name)
+            self.shm.unlink()
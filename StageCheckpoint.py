@@ -0,0 +1,34 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+
+def config_signature(**config):
+    """Firma de la fuente y la configuración: un checkpoint solo se reutiliza si coincide exactamente."""
+    text = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def save_checkpoint(path, signature, **arrays):
+    """Guarda el estado de la etapa de forma atómica (un reinicio nunca lee un archivo a medias)."""
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, _signature=np.array(signature), _saved_at=np.array(time.time()), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, signature, max_age=None):
+    """Devuelve el estado guardado, o None si no existe, es de otra fuente/configuración o es demasiado antiguo."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            if str(data["_signature"]) != signature:
+                return None
+            if max_age is not None and time.time() - float(data["_saved_at"]) > max_age:
+                return None
+            return {key: data[key] for key in data.files if not key.startswith("_")}
+    except (OSError, ValueError, KeyError):
+        # Checkpoint corrupto: se ignora y se calibra desde cero
+        return None
@@ -0,0 +1,193 @@
+import atexit
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Activar desde el entorno sin tocar la línea de comandos: RELAXATION_PROFILE=1
+PROFILE_ENV = "RELAXATION_PROFILE"
+
+
+def add_profiling_arguments(parser):
+    """Agrega las opciones comunes de perfilado a un ArgumentParser."""
+    group = parser.add_argument_group("perfilado")
+    group.add_argument("--profile", action="store_true",
+                       help=f"Perfilar el bucle principal (también con {PROFILE_ENV}=1)")
+    group.add_argument("--profile-output", default=None, help="Archivo del reporte (por defecto profile_<etapa>_<pid>.txt)")
+    group.add_argument("--profile-interval", type=float, default=0.005, help="Periodo de muestreo de la pila en segundos")
+    group.add_argument("--profile-snapshot-every", type=int, default=5000,
+                       help="Iteraciones entre snapshots de tracemalloc")
+    return parser
+
+
+class StageProfiler:
+    """Perfilador de bucles de tiempo real: muestreo de pila, asignaciones por iteración e iteraciones por segundo.
+
+    Deshabilitado, tick() no hace nada más que una comparación. Habilitado, escribe un reporte al salir.
+    """
+
+    def __init__(self, stage, enabled=False, output=None, interval=0.005, snapshot_every=5000, top=25):
+        self.stage = stage
+        self.enabled = enabled
+        self.output = output or f"profile_{stage}_{os.getpid()}.txt"
+        self.interval = interval
+        self.snapshot_every = snapshot_every
+        self.top = top
+
+        self.iterations = 0
+        self.started_at = None
+        self.last_tick = None
+        self.iteration_times = collections.deque(maxlen=100000)
+        self.rate_window_start = None
+        self.rate_window_count = 0
+        self.rates = []
+
+        self.self_samples = collections.Counter()
+        self.cumulative_samples = collections.Counter()
+        self.total_samples = 0
+        self.target_thread = None
+        self.sampler = None
+        self.running = False
+
+        self.last_snapshot = None
+        self.last_snapshot_iteration = 0
+        self.allocation_growth = collections.Counter()
+        self.allocation_iterations = 0
+        self.transient_bytes = collections.deque(maxlen=100000)
+        self.iteration_start_memory = 0
+        self.in_snapshot = False
+
+    @classmethod
+    def from_args(cls, stage, args=None):
+        """Crea el perfilador según --profile o la variable de entorno, y lo arranca si está habilitado."""
+        env_enabled = os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+        enabled = bool(getattr(args, "profile", False)) or env_enabled
+        profiler = cls(stage, enabled,
+                       output=getattr(args, "profile_output", None),
+                       interval=getattr(args, "profile_interval", 0.005),
+                       snapshot_every=getattr(args, "profile_snapshot_every", 5000))
+        if enabled:
+            profiler.start()
+        return profiler
+
+    def start(self):
+        self.enabled = True
+        self.running = True
+        self.started_at = time.perf_counter()
+        self.target_thread = threading.get_ident()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        self.last_snapshot = tracemalloc.take_snapshot()
+        self.sampler = threading.Thread(target=self.sample_loop, daemon=True)
+        self.sampler.start()
+        atexit.register(self.stop)
+        print(f"[perfilado] {self.stage}: reporte en '{self.output}' al salir")
+
+    def tick(self):
+        """Marca el fin de una iteración del bucle principal."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.iteration_times.append(now - self.last_tick)
+        self.last_tick = now
+        self.iterations += 1
+
+        # Memoria temporal usada por la iteración: pico desde la iteración anterior menos memoria al inicio
+        current, peak = tracemalloc.get_traced_memory()
+        self.transient_bytes.append(max(peak - self.iteration_start_memory, 0))
+        tracemalloc.reset_peak()
+        self.iteration_start_memory = current
+
+        if self.rate_window_start is None:
+            self.rate_window_start = now
+        self.rate_window_count += 1
+        if now - self.rate_window_start >= 1.0:
+            self.rates.append(self.rate_window_count / (now - self.rate_window_start))
+            self.rate_window_start = now
+            self.rate_window_count = 0
+
+        if self.iterations - self.last_snapshot_iteration >= self.snapshot_every:
+            self.take_allocation_snapshot()
+            # El costo del snapshot no se cuenta como tiempo de la iteración
+            self.last_tick = time.perf_counter()
+
+    def take_allocation_snapshot(self):
+        self.in_snapshot = True
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            for stat in snapshot.compare_to(self.last_snapshot, 'lineno'):
+                frame = stat.traceback[0]
+                if stat.count_diff > 0 and frame.filename not in (tracemalloc.__file__, __file__):
+                    self.allocation_growth[(frame.filename, frame.lineno)] += stat.count_diff
+            self.allocation_iterations += self.iterations - self.last_snapshot_iteration
+            self.last_snapshot = snapshot
+            self.last_snapshot_iteration = self.iterations
+        finally:
+            self.in_snapshot = False
+
+    def sample_loop(self):
+        """Muestrea periódicamente la pila del hilo del bucle principal."""
+        while self.running:
+            frame = sys._current_frames().get(self.target_thread)
+            # Las muestras tomadas durante un snapshot de tracemalloc son costo del perfilador
+            if frame is not None and not self.in_snapshot:
+                self.total_samples += 1
+                leaf = frame
+                self.self_samples[(leaf.f_code.co_filename, leaf.f_lineno, leaf.f_code.co_name)] += 1
+                seen = set()
+                while frame is not None:
+                    key = (frame.f_code.co_filename, frame.f_code.co_name)
+                    if key not in seen:
+                        seen.add(key)
+                        self.cumulative_samples[key] += 1
+                    frame = frame.f_back
+            time.sleep(self.interval)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.sampler.join(timeout=1)
+        try:
+            with open(self.output, "w", encoding="utf-8") as f:
+                f.write(self.report())
+            print(f"[perfilado] reporte guardado en '{self.output}'")
+        except OSError as e:
+            print(f"[perfilado] no se pudo guardar el reporte: {e}")
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started_at
+        lines = [f"Perfil de la etapa '{self.stage}' ({elapsed:.1f} s, {self.iterations} iteraciones)", ""]
+
+        lines.append("== Iteraciones por segundo ==")
+        if self.rates:
+            lines.append(f"media {sum(self.rates) / len(self.rates):.1f}  min {min(self.rates):.1f}  max {max(self.rates):.1f}")
+        if self.iteration_times:
+            times = sorted(self.iteration_times)
+            pick = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000
+            lines.append(f"tiempo por iteración: p50 {pick(0.5):.3f} ms  p99 {pick(0.99):.3f} ms  max {times[-1] * 1000:.3f} ms")
+        lines.append("")
+
+        lines.append(f"== CPU: líneas más muestreadas ({self.total_samples} muestras cada {self.interval * 1000:.1f} ms) ==")
+        for (filename, lineno, name), count in self.self_samples.most_common(self.top):
+            lines.append(f"{100 * count / max(self.total_samples, 1):6.2f}%  {os.path.basename(filename)}:{lineno} {name}")
+        lines.append("")
+        lines.append("== CPU: funciones (acumulado) ==")
+        for (filename, name), count in self.cumulative_samples.most_common(self.top):
+            lines.append(f"{100 * count / max(self.total_samples, 1):6.2f}%  {os.path.basename(filename)} {name}")
+        lines.append("")
+
+        lines.append("== Asignaciones nuevas por iteración (tracemalloc) ==")
+        if self.allocation_iterations:
+            for (filename, lineno), count in self.allocation_growth.most_common(self.top):
+                lines.append(f"{count / self.allocation_iterations:10.3f} bloques/iter  {os.path.basename(filename)}:{lineno}")
+        if self.transient_bytes:
+            transient = sorted(self.transient_bytes)
+            lines.append(f"pico temporal por iteración: p50 {transient[len(transient) // 2] / 1024:.1f} KiB  "
+                         f"max {transient[-1] / 1024:.1f} KiB")
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"memoria trazada: actual {current / 1024:.1f} KiB  pico {peak / 1024:.1f} KiB")
+        return "\n".join(lines) + "\n"
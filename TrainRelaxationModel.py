@@ -0,0 +1,78 @@
+import argparse
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from BatchReprocessing import find_recordings
+from EEGFeatures import BANDS
+from FeatureStore import FeatureStore
+
+# Mismas columnas que el modelo relaxation_random_forest.pkl existente
+FEATURE_NAMES = ["Mean", "STD", "Asymmetry"]
+ALPHA_INDEX = list(BANDS).index("alpha")
+# Par de canales (izquierda, derecha) para la asimetría frontal alpha
+ASYMMETRY_PAIR = (0, 2)
+
+
+def model_features(epoch_band_powers):
+    """Convierte las potencias por banda de cada época en las features del bosque: media, desviación y asimetría alpha."""
+    alpha = epoch_band_powers[:, ALPHA_INDEX::len(BANDS)]
+    left, right = ASYMMETRY_PAIR
+    with np.errstate(divide='ignore', invalid='ignore'):
+        asymmetry = np.log(alpha[:, right]) - np.log(alpha[:, left])
+    return pd.DataFrame({
+        "Mean": alpha.mean(axis=1),
+        "STD": alpha.std(axis=1),
+        "Asymmetry": asymmetry,
+    }, columns=FEATURE_NAMES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reentrena el Random Forest de relajación desde la caché de features")
+    parser.add_argument("--root", default="participants", help="Carpeta con participants/<id>/*.csv")
+    parser.add_argument("--cache-dir", default="feature_cache", help="Carpeta de la caché de features")
+    parser.add_argument("--output", default="relaxation_random_forest_retrained.pkl",
+                        help="Archivo del modelo entrenado (no reemplaza relaxation_random_forest.pkl por defecto)")
+    parser.add_argument("--overwrite", action="store_true", help="Permitir sobrescribir un modelo existente en --output")
+    parser.add_argument("--fs", type=float, default=250, help="Frecuencia de muestreo de las grabaciones")
+    parser.add_argument("--epoch", type=float, default=2.0, help="Duración de cada época en segundos")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Número de árboles")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para extraer features (por defecto todos los núcleos)")
+    parser.add_argument("--prune", action="store_true", help="Borrar entradas de caché que ya no se usan")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output) and not args.overwrite:
+        print(f"'{args.output}' ya existe; usa --overwrite para reemplazarlo o elige otro --output.")
+        return
+
+    files = find_recordings(args.root)
+    if not files:
+        print(f"No se encontraron grabaciones en '{args.root}'.")
+        return
+
+    start_time = time.time()
+    store = FeatureStore(args.cache_dir, {"fs": args.fs, "epoch_seconds": args.epoch})
+    computed = store.update(files, workers=args.workers)
+    print(f"{computed} de {len(files)} sesiones recalculadas ({time.time() - start_time:.1f} s)")
+    if args.prune:
+        print(f"{store.prune(files)} entradas de caché eliminadas")
+
+    band_features, labels, _ = store.load(files)
+    X = model_features(band_features)
+    valid = np.isfinite(X.to_numpy()).all(axis=1)
+    X, y = X[valid], labels[valid].astype(int)
+    if len(np.unique(y)) < 2:
+        print("Las épocas disponibles no contienen ambas clases; no se entrena el modelo.")
+        return
+
+    model = RandomForestClassifier(n_estimators=args.n_estimators, n_jobs=-1, random_state=0)
+    model.fit(X, y)
+    with open(args.output, "wb") as f:
+        pickle.dump(model, f)
+    print(f"Modelo entrenado con {len(y)} épocas y guardado en '{args.output}' ({time.time() - start_time:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
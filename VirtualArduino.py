@@ -0,0 +1,126 @@
+import argparse
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+# Mismo protocolo de líneas que el sketch del Arduino
+LED_COMMANDS = {"low_relaxation", "medium_relaxation", "high_relaxation", "very_high_relaxation"}
+SCENT_COMMANDS = {"neutral_scent", "sandalwood_scent", "marine_scent", "herbal_scent"}
+
+
+class VirtualArduino:
+    """Arduino simulado sobre un pseudo-terminal de Linux (self.port se abre como cualquier puerto serial).
+
+    :param response_delay: segundos antes de responder cada comando
+    :param drop_rate: probabilidad de no responder a un comando
+    :param disconnect_rate: probabilidad de quedar sin responder `disconnect_duration` segundos tras un comando
+    """
+
+    def __init__(self, response_delay=0.0, drop_rate=0.0, disconnect_rate=0.0, disconnect_duration=3.0, seed=None):
+        self.response_delay = response_delay
+        self.drop_rate = drop_rate
+        self.disconnect_rate = disconnect_rate
+        self.disconnect_duration = disconnect_duration
+        self.random = random.Random(seed)
+
+        self.master_fd, self.slave_fd = os.openpty()
+        # Sin eco ni traducción de saltos de línea, como un puerto serial real
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+
+        self.led_state = None
+        self.scent_state = None
+        self.received = []      # (tiempo perf_counter, comando) de cada línea recibida
+        self.running = False
+        self.offline_until = 0.0
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def reply_for(self, command):
+        if command == "ping":
+            return "pong"
+        if command in LED_COMMANDS:
+            self.led_state = command
+            return f"LED:{command}"
+        if command in SCENT_COMMANDS:
+            self.scent_state = command
+            return f"SCENT:{command}"
+        if command == "shutdown":
+            self.led_state = None
+            self.scent_state = None
+            return "OFF"
+        return f"ERR:{command}"
+
+    def handle(self, command):
+        now = time.perf_counter()
+        self.received.append((now, command))
+        if now < self.offline_until:
+            return
+        if self.disconnect_rate and self.random.random() < self.disconnect_rate:
+            self.offline_until = now + self.disconnect_duration
+            return
+        reply = self.reply_for(command)
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            return
+        if self.response_delay:
+            time.sleep(self.response_delay)
+        os.write(self.master_fd, f"{reply}\r\n".encode("utf-8"))
+
+    def run(self):
+        pending = b""
+        while self.running:
+            ready, _, _ = select.select([self.master_fd], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master_fd, 1024)
+            except OSError:
+                break
+            pending += data
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                command = line.decode("utf-8", errors="replace").strip()
+                if command:
+                    self.handle(command)
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arduino virtual sobre un pseudo-terminal")
+    parser.add_argument("--delay", type=float, default=0.0, help="Retardo de respuesta en segundos")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Probabilidad de no responder")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Probabilidad de desconexión temporal")
+    parser.add_argument("--disconnect-duration", type=float, default=3.0, help="Duración de cada desconexión")
+    args = parser.parse_args()
+
+    device = VirtualArduino(args.delay, args.drop_rate, args.disconnect_rate, args.disconnect_duration).start()
+    print(f"Arduino virtual escuchando en {device.port}")
+    print(f"  python MultisensoryDeviceController.py --port {device.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+
+
+if __name__ == "__main__":
+    main()